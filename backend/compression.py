@@ -0,0 +1,179 @@
+"""Negotiated gzip/brotli response compression.
+
+An ASGI middleware that compresses responses above a size threshold with the best
+encoding the client accepts: brotli when the optional ``brotli`` package is installed,
+otherwise gzip. Responses that already carry a Content-Encoding or whose media type is
+already compressed (images, archives, fonts) are passed through untouched. Streaming
+responses are compressed incrementally.
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "font/woff")
+INCOMPRESSIBLE_EXACT_TYPES = {
+    "application/zip", "application/gzip", "application/x-gzip", "application/x-brotli",
+    "application/octet-stream", "application/pdf", "application/x-7z-compressed"
+}
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Map each accepted encoding to its q-value, e.g. "gzip, br;q=0.8" -> {"gzip": 1.0, "br": 0.8}"""
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header: str):
+    """Pick brotli or gzip from an Accept-Encoding header, or None if neither is acceptable"""
+    accepted = parse_accept_encoding(header)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if not media_type:
+        return True
+    return media_type not in INCOMPRESSIBLE_EXACT_TYPES and not media_type.startswith(INCOMPRESSIBLE_TYPES)
+
+
+class Compressor:
+    """Incremental gzip or brotli compressor with a common interface"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16 + MAX_WBITS writes a gzip header and trailer
+            self.compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(data)
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(b"") + self.compressor.flush()
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """Hold back the response start until the first body chunk shows whether to compress"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.start_message = message
+            self.passthrough = (
+                "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+                or message["status"] in (204, 304)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.downstream(self.start_message)
+                self.start_message = None
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Too small to be worth the CPU and the encoding overhead
+                await self.downstream(self.start_message)
+                self.start_message = None
+                await self.downstream(message)
+                return
+
+            self.compressor = Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                body = self.compressor.compress(body) + self.compressor.flush()
+            else:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+            await self.downstream(self.start_message)
+            self.start_message = None
+            await self.downstream({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        if self.compressor is None:
+            # Small, single-chunk response already sent uncompressed
+            await self.downstream(message)
+            return
+
+        if more_body:
+            body = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            body = self.compressor.compress(body) + self.compressor.finish()
+        await self.downstream({"type": "http.response.body", "body": body, "more_body": more_body})
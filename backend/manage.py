@@ -0,0 +1,63 @@
+"""Maintenance commands for the Work Hours Tracker backend.
+
+Run ``migrate`` once per deploy, before or alongside starting the workers: workers report ready
+on /readyz only once every migration has completed (unless BOOTSTRAP_ON_STARTUP=true).
+
+Usage:
+    python manage.py migrate
+    python manage.py sweep-orphans [--dry-run] [--compact]
+    python manage.py refresh-employee-status
+"""
+import argparse
+import asyncio
+import json
+
+from server import (
+    MigrationInProgress, client, deactivate_released_employees, initialize_database, sweep_orphans
+)
+
+
+async def run_migrate(args):
+    try:
+        await initialize_database()
+    except MigrationInProgress as e:
+        raise SystemExit(f"{e}; retry once it has finished")
+    print("Indexes, seed data and migrations are up to date")
+
+
+async def run_sweep_orphans(args):
+    report = await sweep_orphans(dry_run=args.dry_run, compact=args.compact)
+    print(json.dumps(report, indent=2, default=str))
+
+
+async def run_refresh_employee_status(args):
+    deactivated = await deactivate_released_employees()
+    print(f"Marked {deactivated} employees Inactive")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Work Hours Tracker maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    migrate_parser = subparsers.add_parser("migrate", help="Build indexes, seed defaults and run one-time migrations")
+    migrate_parser.set_defaults(handler=run_migrate)
+    
+    sweep_parser = subparsers.add_parser("sweep-orphans", help="Delete documents whose references no longer resolve")
+    sweep_parser.add_argument("--dry-run", action="store_true", help="Only report orphans, do not delete them")
+    sweep_parser.add_argument("--compact", action="store_true", help="Run compact on collections that had deletions")
+    sweep_parser.set_defaults(handler=run_sweep_orphans)
+    
+    status_parser = subparsers.add_parser(
+        "refresh-employee-status", help="Mark employees whose release date has passed as Inactive (for cron)"
+    )
+    status_parser.set_defaults(handler=run_refresh_employee_status)
+    
+    args = parser.parse_args()
+    try:
+        asyncio.run(args.handler(args))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Request latency and MongoDB round-trip instrumentation.
+
+A PyMongo command listener attributes every Mongo command to the HTTP request
+that issued it (through a context variable that Motor copies into its executor
+threads), and a small in-process registry renders the collected histograms in
+the Prometheus text exposition format. Requests and commands above the slow-log
+thresholds are written as JSON lines to the ``slowlog`` logger, with filter
+values redacted.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from pymongo import monitoring
+
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+SLOW_LOG_MAX_QUERIES = int(os.environ.get("SLOW_LOG_MAX_QUERIES", "5"))
+SLOW_LOG_EXPLAIN_SAMPLE_RATE = float(os.environ.get("SLOW_LOG_EXPLAIN_SAMPLE_RATE", "0.1"))
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+
+slow_logger = logging.getLogger("slowlog")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_COMMAND_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Per-request accumulator; None outside of an HTTP request
+current_request_stats: ContextVar[Optional[dict]] = ContextVar("current_request_stats", default=None)
+
+
+def new_request_stats() -> dict:
+    return {
+        "start": time.perf_counter(),
+        "db_commands": 0,
+        "db_seconds": 0.0,
+        "principal_role": None,
+        "started_commands": {},
+        "slow_queries": [],
+        "lock": threading.Lock()
+    }
+
+
+# Pipeline options whose string values are collection/field names rather than user data
+STRUCTURAL_KEYS = {"from", "localField", "foreignField", "as", "$unwind", "$count", "$unset"}
+
+
+def redact(value, key: str = None):
+    """Replace every literal in a filter or pipeline with "?" while keeping field names, operators and field paths"""
+    if isinstance(value, dict):
+        return {item_key: redact(item, item_key) for item_key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(value[0], key)] if value else []
+    if isinstance(value, str) and (key in STRUCTURAL_KEYS or value.startswith("$")):
+        return value
+    return "?"
+
+
+def command_target(command_name: str, command: dict):
+    """Extract (collection, filter or pipeline) from a command document, or (None, None) if it has no filter"""
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        return None, None
+    if command_name == "find":
+        return collection, command.get("filter", {})
+    if command_name == "aggregate":
+        return collection, command.get("pipeline", [])
+    if command_name in ("count", "distinct", "findAndModify"):
+        return collection, command.get("query", {})
+    if command_name == "update" and command.get("updates"):
+        return collection, command["updates"][0].get("q", {})
+    if command_name == "delete" and command.get("deletes"):
+        return collection, command["deletes"][0].get("q", {})
+    return collection, None
+
+
+def query_shape(command_name: str, target) -> Optional[str]:
+    if target is None:
+        return None
+    if command_name == "aggregate":
+        # Keep every pipeline stage rather than collapsing the list to its first element
+        return json.dumps([redact(stage) for stage in target], sort_keys=True, default=str)
+    return json.dumps(redact(target), sort_keys=True, default=str)
+
+
+def summarize_plan(plan: dict) -> str:
+    """Flatten a winning plan into e.g. "FETCH <- IXSCAN(user_id_1)" """
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " <- ".join(stages)
+
+
+async def explain_query(database, query: dict) -> str:
+    """Run explain (queryPlanner only, so the query is not executed) and summarize the winning plan"""
+    command_name, collection, target = query["command"], query["collection"], query["target"]
+    if command_name == "find":
+        explained = {"find": collection, "filter": target}
+    elif command_name == "aggregate":
+        explained = {"aggregate": collection, "pipeline": target, "cursor": {}}
+    elif command_name == "count":
+        explained = {"count": collection, "query": target}
+    else:
+        explained = {"distinct": collection, "key": query.get("key", "_id"), "query": target}
+    
+    result = await database.command("explain", explained, verbosity="queryPlanner")
+    planner = result.get("queryPlanner") or result.get("stages", [{}])[0].get("$cursor", {}).get("queryPlanner", {})
+    return summarize_plan(planner.get("winningPlan", {}))
+
+
+async def log_slow_request(database, method: str, route: str, status_code: int, duration: float, stats: dict):
+    """Write a slow-log entry for a request, explaining its slowest queries on a sampled basis"""
+    slow_queries = sorted(stats["slow_queries"], key=lambda query: query["duration_ms"], reverse=True)
+    slow_queries = slow_queries[:SLOW_LOG_MAX_QUERIES]
+    
+    if slow_queries and random.random() < SLOW_LOG_EXPLAIN_SAMPLE_RATE:
+        for query in slow_queries:
+            if query["command"] in EXPLAINABLE_COMMANDS:
+                try:
+                    query["plan"] = await explain_query(database, query)
+                except Exception as e:
+                    query["plan_error"] = str(e)
+    
+    slow_logger.warning(json.dumps({
+        "type": "slow_request",
+        "method": method,
+        "route": route,
+        "status": status_code,
+        "duration_ms": round(duration * 1000, 1),
+        "principal_role": stats["principal_role"],
+        "db_commands": stats["db_commands"],
+        "db_ms": round(stats["db_seconds"] * 1000, 1),
+        "slow_queries": [
+            {key: value for key, value in query.items() if key not in ("target", "key")}
+            for query in slow_queries
+        ]
+    }, default=str))
+
+
+def is_slow_request(duration: float, stats: dict) -> bool:
+    return duration * 1000 >= SLOW_REQUEST_MS or bool(stats["slow_queries"])
+
+
+class Histogram:
+    """Cumulative histogram with one series per label set"""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self, label_names: tuple) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            label_text = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(label_names, labels))
+            prefix = f"{label_text}," if label_text else ""
+            for bound, count in zip(self.buckets, series["buckets"]):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series['sum']}")
+            lines.append(f"{self.name}_count{{{label_text}}} {series['count']}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with one series per label set"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.series = {}
+
+    def inc(self, labels: tuple, value: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self, label_names: tuple) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            label_text = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(label_names, labels))
+            lines.append(f"{self.name}{{{label_text}}} {value}")
+        return lines
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LABELS = ("method", "route", "status")
+ROUTE_LABELS = ("method", "route")
+COMMAND_LABELS = ("command",)
+
+registry_lock = threading.Lock()
+request_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", LATENCY_BUCKETS
+)
+request_db_commands = Histogram(
+    "http_request_db_commands", "MongoDB commands issued per HTTP request", DB_COMMAND_BUCKETS
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent in MongoDB per HTTP request", LATENCY_BUCKETS
+)
+mongo_commands_total = Counter("mongo_commands_total", "MongoDB commands by command name")
+mongo_command_failures_total = Counter("mongo_command_failures_total", "Failed MongoDB commands by command name")
+mongo_command_seconds_total = Counter("mongo_command_seconds_total", "MongoDB command time by command name")
+
+
+def record_request(method: str, route: str, status_code: int, stats: dict) -> float:
+    """Record a finished request's latency and DB usage, returning its duration in seconds"""
+    duration = time.perf_counter() - stats["start"]
+    with registry_lock:
+        request_latency.observe((method, route, str(status_code)), duration)
+        request_db_commands.observe((method, route), stats["db_commands"])
+        request_db_seconds.observe((method, route), stats["db_seconds"])
+    return duration
+
+
+def render_metrics() -> str:
+    with registry_lock:
+        lines = []
+        lines += request_latency.render(REQUEST_LABELS)
+        lines += request_db_commands.render(ROUTE_LABELS)
+        lines += request_db_seconds.render(ROUTE_LABELS)
+        lines += mongo_commands_total.render(COMMAND_LABELS)
+        lines += mongo_command_failures_total.render(COMMAND_LABELS)
+        lines += mongo_command_seconds_total.render(COMMAND_LABELS)
+    return "\n".join(lines) + "\n"
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts MongoDB commands and their time, globally and for the current request"""
+
+    def started(self, event):
+        stats = current_request_stats.get()
+        if stats is None:
+            return
+        collection, target = command_target(event.command_name, event.command)
+        with stats["lock"]:
+            stats["started_commands"][event.request_id] = {
+                "command": event.command_name,
+                "collection": collection,
+                "target": target,
+                "key": event.command.get("key")
+            }
+
+    def succeeded(self, event):
+        self.record(event, failed=False)
+
+    def failed(self, event):
+        self.record(event, failed=True)
+
+    def record(self, event, failed: bool):
+        seconds = event.duration_micros / 1_000_000
+        labels = (event.command_name,)
+        with registry_lock:
+            mongo_commands_total.inc(labels)
+            mongo_command_seconds_total.inc(labels, seconds)
+            if failed:
+                mongo_command_failures_total.inc(labels)
+
+        stats = current_request_stats.get()
+        if stats is None:
+            if seconds * 1000 >= SLOW_QUERY_MS:
+                slow_logger.warning(json.dumps({
+                    "type": "slow_query",
+                    "command": event.command_name,
+                    "duration_ms": round(seconds * 1000, 1)
+                }))
+            return
+        
+        with stats["lock"]:
+            stats["db_commands"] += 1
+            stats["db_seconds"] += seconds
+            started = stats["started_commands"].pop(event.request_id, None)
+            if started and seconds * 1000 >= SLOW_QUERY_MS:
+                stats["slow_queries"].append({
+                    **started,
+                    "shape": query_shape(started["command"], started["target"]),
+                    "duration_ms": round(seconds * 1000, 1),
+                    "failed": failed
+                })
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -6,21 +7,37 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, ValidationError
 from typing import List, Optional
 import uuid
+import asyncio
+import base64
+import codecs
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
 import jwt
 import bcrypt
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.collation import Collation
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import calendar as cal
+from dateutil import parser as date_parser
+from compression import CompressionMiddleware
+from metrics import (
+    MongoCommandListener, current_request_stats, is_slow_request, log_slow_request,
+    new_request_stats, record_request, render_metrics
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandListener()])
 db = client[os.environ['DB_NAME']]
 
 # JWT Configuration
@@ -29,7 +46,10 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 hours
 
 # Create the main app
-app = FastAPI(title="Work Hours Tracker")
+# orjson serializes datetimes natively and is several times faster than the stdlib encoder. The large
+# list endpoints build JSON-shaped dicts themselves and return ORJSONResponse directly, which skips
+# jsonable_encoder and serializes the body in a single orjson pass
+app = FastAPI(title="Work Hours Tracker", default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -38,15 +58,19 @@ api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
 # Models
-class User(BaseModel):
+class Principal(BaseModel):
+    """An authenticated user as loaded for auth and listings, without the password hash"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     email: EmailStr
     phone: str
-    password_hash: str
     role: str = "employee"
+    timezone: str = ""  # IANA name; blank follows the organization timezone
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class User(Principal):
+    password_hash: str
+
 class UserCreate(BaseModel):
     name: str
     email: EmailStr
@@ -67,6 +91,7 @@ class EmployeeCreate(BaseModel):
     department: str = ""
     joining_date: str = ""
     release_date: str = ""
+    timezone: str = ""
 
 class EmployeeUpdate(BaseModel):
     name: str
@@ -81,6 +106,7 @@ class EmployeeUpdate(BaseModel):
     department: str = ""
     joining_date: str = ""
     release_date: str = ""
+    timezone: str = ""
 
 class UserLogin(BaseModel):
     email_or_phone: str
@@ -103,6 +129,7 @@ class WorkSession(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
     start_time: datetime
+    work_date: Optional[datetime] = None  # Local workday as UTC midnight, the key "today's session" is matched on
     end_time: Optional[datetime] = None
     is_half_day: bool = False
     total_break_seconds: int = 0
@@ -153,6 +180,10 @@ class ProjectCreate(BaseModel):
     end_date: str = ""
     status: str = "Active"  # Active, Completed, On Hold
 
+class ProjectMembershipUpdate(BaseModel):
+    add_employee_ids: List[str] = []
+    remove_employee_ids: List[str] = []
+
 class OrganizationSettings(BaseModel):
     company_name: str
     company_logo: str = ""  # Base64 encoded or file path
@@ -163,6 +194,7 @@ class OrganizationSettings(BaseModel):
     address: str = ""
     phone: str = ""
     website: str = ""
+    timezone: str = "UTC"
 
 class OrganizationUpdate(BaseModel):
     company_name: str
@@ -173,6 +205,7 @@ class OrganizationUpdate(BaseModel):
     address: str = ""
     phone: str = ""
     website: str = ""
+    timezone: Optional[str] = None  # Left unchanged when omitted
 
 class LeaveApplication(BaseModel):
     leave_type: str  # Casual, Sick, LWP
@@ -204,6 +237,11 @@ class LeaveApprovalRequest(BaseModel):
     status: str  # approved, rejected
     manager_reason: str = ""
 
+class BulkLeaveApprovalRequest(BaseModel):
+    request_ids: List[str]
+    status: str  # approved, rejected
+    manager_reason: str = ""
+
 class LeaveBalance(BaseModel):
     user_id: str
     casual_leave: int = 0
@@ -224,7 +262,139 @@ class ProjectAssignment(BaseModel):
     employee_id: str
     assigned_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# Field projections: only the fields each response renders cross the wire
+def projection(*fields: str) -> dict:
+    """Mongo projection returning just the given fields, without _id"""
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+EXISTS_PROJECTION = {"_id": 1}
+PRINCIPAL_PROJECTION = projection(*Principal.model_fields)
+LOGIN_PROJECTION = projection("id", "password_hash")
+USER_SUMMARY_PROJECTION = projection("id", "name", "email")
+EMPLOYEE_LIST_PROJECTION = projection(
+    "id", "name", "email", "phone", "dob", "blood_group", "emergency_contact", "address", "aadhar_card",
+    "designation", "department", "joining_date", "release_date", "status", "timezone", "created_at"
+)
+MANAGER_ASSIGNMENT_PROJECTION = projection("id", "name", "email", "manager_id", "manager_name")
+SESSION_PROJECTION = projection(*WorkSession.model_fields)
+BREAK_PROJECTION = projection(*Break.model_fields)
+CALENDAR_SESSION_PROJECTION = projection("start_time", "work_date", "end_time", "is_half_day", "effective_seconds")
+CALENDAR_LEAVE_PROJECTION = projection("date", "type", "reason")
+HOLIDAY_PROJECTION = projection("id", "name", "date", "type")
+PROJECT_SUMMARY_PROJECTION = projection("id", "name", "description", "status", "start_date", "end_date", "manager_id")
+
 # Utility functions
+def parse_release_date(release_date: str) -> Optional[datetime]:
+    """Parse an ISO release date from the API into the UTC datetime stored in Mongo; raises ValueError if malformed"""
+    if not release_date or not release_date.strip():
+        return None
+    parsed = datetime.fromisoformat(release_date.strip())
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def to_utc_date(value) -> Optional[datetime]:
+    """Normalize a calendar date (YYYY-MM-DD, ISO datetime or datetime) to UTC midnight, the form dates are stored in"""
+    if value is None or value == "":
+        return None
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip())
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc)
+    return datetime(parsed.year, parsed.month, parsed.day, tzinfo=timezone.utc)
+
+def date_or_400(value, field: str) -> Optional[datetime]:
+    try:
+        return to_utc_date(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}, expected YYYY-MM-DD")
+
+def date_key(value) -> str:
+    """Render a stored date as YYYY-MM-DD (legacy string values pass through)"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    return value or ""
+
+def compute_employee_status(release_date: Optional[datetime], now: datetime = None) -> str:
+    """Derive Active/Inactive from an employee's stored release date"""
+    if release_date is None:
+        return "Active"
+    if release_date.tzinfo is None:
+        release_date = release_date.replace(tzinfo=timezone.utc)
+    return "Inactive" if release_date <= (now or datetime.now(timezone.utc)) else "Active"
+
+def release_date_or_400(release_date: str) -> Optional[datetime]:
+    try:
+        return parse_release_date(release_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid release_date, expected YYYY-MM-DD")
+
+# Workday boundaries: sessions are keyed by the calendar day they start on in the employee's timezone
+ORGANIZATION_TIMEZONE = os.environ.get("ORGANIZATION_TIMEZONE", "UTC")
+ORGANIZATION_TIMEZONE_TTL_SECONDS = int(os.environ.get("ORGANIZATION_TIMEZONE_TTL_SECONDS", "300"))
+organization_timezone_cache = {"name": None, "refreshed_at": None}
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Load a timezone once per process; raises ValueError for unknown names"""
+    try:
+        return ZoneInfo(name)
+    except (KeyError, ValueError):
+        raise ValueError(f"Unknown timezone {name!r}")
+
+def timezone_or_400(name: Optional[str]) -> str:
+    """Validate an IANA timezone name; blank means follow the organization timezone"""
+    name = (name or "").strip()
+    if name:
+        try:
+            get_zone(name)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid timezone {name!r}, expected an IANA name like Asia/Kolkata")
+    return name
+
+@lru_cache(maxsize=4096)
+def workday_window(tz_name: str, work_date: datetime) -> tuple:
+    """UTC [start, end) bounds of a local calendar day; offsets only change at DST transitions, so cache per day"""
+    start = datetime(work_date.year, work_date.month, work_date.day, tzinfo=get_zone(tz_name))
+    end = start + timedelta(days=1)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+def local_work_date(moment: datetime, tz_name: str) -> datetime:
+    """The local workday an instant falls on, as the UTC-midnight key dates are stored under"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    # UTC offsets are under a day, so the local date is the UTC date or one either side of it
+    day = datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+    start, end = workday_window(tz_name, day)
+    if moment < start:
+        return day - timedelta(days=1)
+    if moment >= end:
+        return day + timedelta(days=1)
+    return day
+
+async def get_organization_timezone() -> str:
+    """The organization timezone from settings, cached for ORGANIZATION_TIMEZONE_TTL_SECONDS"""
+    now = datetime.now(timezone.utc)
+    refreshed_at = organization_timezone_cache["refreshed_at"]
+    if refreshed_at is None or (now - refreshed_at).total_seconds() > ORGANIZATION_TIMEZONE_TTL_SECONDS:
+        settings = await db.organization_settings.find_one({}, {"_id": 0, "timezone": 1})
+        organization_timezone_cache["name"] = (settings or {}).get("timezone") or ORGANIZATION_TIMEZONE
+        organization_timezone_cache["refreshed_at"] = now
+    return organization_timezone_cache["name"]
+
+async def user_timezone(user: Principal) -> str:
+    return user.timezone or await get_organization_timezone()
+
+def session_date_key(session: dict) -> str:
+    """A session's workday as YYYY-MM-DD, falling back to the UTC start date for sessions without work_date"""
+    return date_key(session.get("work_date")) or session["start_time"].date().isoformat()
+
+async def count_by_user(collection, match: dict) -> dict:
+    """Count documents per user_id in one grouped query"""
+    counts = await collection.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    return {item["_id"]: item["count"] for item in counts}
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
@@ -238,6 +408,12 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def set_principal_role(role: str):
+    """Record the authenticated user's role on the current request's stats for the slow log"""
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats["principal_role"] = role
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
@@ -247,10 +423,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id, "is_deleted": {"$ne": True}}, PRINCIPAL_PROJECTION)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
-    return User(**user)
+    set_principal_role(user.get("role"))
+    return Principal(**user)
 
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
@@ -261,14 +438,15 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id, "is_deleted": {"$ne": True}}, PRINCIPAL_PROJECTION)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
+    set_principal_role(user.get("role"))
     if user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
         
-    return User(**user)
+    return Principal(**user)
 
 def calculate_effective_seconds(session_start: datetime, breaks: List[dict]) -> int:
     """Calculate effective work seconds excluding breaks"""
@@ -306,7 +484,7 @@ async def register(user_data: UserCreate):
     # Check if user exists
     existing_user = await db.users.find_one({
         "$or": [{"email": user_data.email}, {"phone": user_data.phone}]
-    })
+    }, EXISTS_PROJECTION)
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
     
@@ -318,7 +496,7 @@ async def register(user_data: UserCreate):
         password_hash=hash_password(user_data.password)
     )
     
-    await db.users.insert_one(user.dict())
+    await db.users.insert_one({**user.dict(), "release_date": None, "status": "Active"})
     
     # Auto-assign new employee to default department
     default_dept = await db.departments.find_one({"name": "General"})
@@ -341,8 +519,9 @@ async def login(login_data: UserLogin):
         "$or": [
             {"email": login_data.email_or_phone},
             {"phone": login_data.email_or_phone}
-        ]
-    })
+        ],
+        "is_deleted": {"$ne": True}
+    }, LOGIN_PROJECTION)
     
     if not user_doc or not verify_password(login_data.password, user_doc["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -350,8 +529,8 @@ async def login(login_data: UserLogin):
     access_token = create_access_token(data={"sub": user_doc["id"]})
     return {"access_token": access_token, "token_type": "bearer"}
 
-@api_router.get("/auth/me", response_model=User)
-async def get_me(current_user: User = Depends(get_current_user)):
+@api_router.get("/auth/me", response_model=Principal)
+async def get_me(current_user: Principal = Depends(get_current_user)):
     return current_user
 
 # Admin Authentication routes
@@ -361,7 +540,7 @@ async def admin_login(login_data: AdminLogin):
     user_doc = await db.users.find_one({
         "email": login_data.email,
         "role": "admin"
-    })
+    }, LOGIN_PROJECTION)
     
     if not user_doc or not verify_password(login_data.password, user_doc["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid admin credentials")
@@ -372,7 +551,7 @@ async def admin_login(login_data: AdminLogin):
 @api_router.post("/admin/auth/create", response_model=Token)
 async def create_admin(admin_data: AdminCreate):
     # Check if admin exists
-    existing_admin = await db.users.find_one({"email": admin_data.email})
+    existing_admin = await db.users.find_one({"email": admin_data.email}, EXISTS_PROJECTION)
     if existing_admin:
         raise HTTPException(status_code=400, detail="Admin already exists")
     
@@ -390,29 +569,27 @@ async def create_admin(admin_data: AdminCreate):
     access_token = create_access_token(data={"sub": admin.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
-@api_router.get("/admin/auth/me", response_model=User)
-async def get_admin_me(current_admin: User = Depends(get_current_admin)):
+@api_router.get("/admin/auth/me", response_model=Principal)
+async def get_admin_me(current_admin: Principal = Depends(get_current_admin)):
     return current_admin
 
 # Session routes
 @api_router.get("/sessions/can-start-today")
-async def can_start_session_today(current_user: User = Depends(get_current_user)):
+async def can_start_session_today(current_user: Principal = Depends(get_current_user)):
     """Check if user can start a new session today"""
-    now = datetime.now(timezone.utc)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
+    work_date = local_work_date(datetime.now(timezone.utc), await user_timezone(current_user))
     
     # Check if user has any session for today
-    existing_session = await db.sessions.find_one({
-        "user_id": current_user.id,
-        "start_time": {"$gte": today_start, "$lte": today_end}
-    })
+    existing_session = await db.sessions.find_one(
+        {"user_id": current_user.id, "work_date": work_date},
+        {"_id": 0, "start_time": 1, "work_date": 1, "end_time": 1}
+    )
     
     if existing_session:
         return {
             "can_start": False,
             "reason": "Already logged in today" if existing_session.get("end_time") else "Active session exists",
-            "session_date": existing_session["start_time"].date().isoformat(),
+            "session_date": session_date_key(existing_session),
             "session_time": existing_session["start_time"].strftime("%H:%M:%S"),
             "is_completed": existing_session.get("end_time") is not None
         }
@@ -423,16 +600,15 @@ async def can_start_session_today(current_user: User = Depends(get_current_user)
     }
 
 @api_router.post("/sessions/start", response_model=WorkSession)
-async def start_session(current_user: User = Depends(get_current_user)):
+async def start_session(current_user: Principal = Depends(get_current_user)):
     now = datetime.now(timezone.utc)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
+    work_date = local_work_date(now, await user_timezone(current_user))
     
     # Check if user already has ANY session for today (active or completed)
-    existing_session = await db.sessions.find_one({
-        "user_id": current_user.id,
-        "start_time": {"$gte": today_start, "$lte": today_end}
-    })
+    existing_session = await db.sessions.find_one(
+        {"user_id": current_user.id, "work_date": work_date},
+        {"_id": 0, "end_time": 1}
+    )
     
     if existing_session:
         if existing_session.get("end_time") is None:
@@ -442,22 +618,27 @@ async def start_session(current_user: User = Depends(get_current_user)):
     
     session = WorkSession(
         user_id=current_user.id,
-        start_time=now
+        start_time=now,
+        work_date=work_date
     )
     
-    await db.sessions.insert_one(session.dict())
+    # The unique (user_id, work_date) index settles concurrent starts that both passed the check above
+    try:
+        await db.sessions.insert_one(session.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="You have already logged in today. Only one login per day is allowed.")
     return session
 
 @api_router.post("/sessions/end")
 async def end_session(
     timesheet_data: TimesheetCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Find active session
     session_doc = await db.sessions.find_one({
         "user_id": current_user.id,
         "end_time": None
-    })
+    }, SESSION_PROJECTION)
     
     if not session_doc:
         raise HTTPException(status_code=404, detail="No active session found")
@@ -465,7 +646,7 @@ async def end_session(
     session = WorkSession(**session_doc)
     
     # Get all breaks for this session
-    breaks = await db.breaks.find({"session_id": session.id}).to_list(length=None)
+    breaks = await db.breaks.find({"session_id": session.id}, BREAK_PROJECTION).to_list(length=None)
     
     # Calculate effective seconds
     effective_seconds = calculate_effective_seconds(session.start_time, breaks)
@@ -518,12 +699,12 @@ async def end_session(
     return {"message": "Session ended successfully"}
 
 @api_router.get("/sessions/active", response_model=Optional[SessionResponse])
-async def get_active_session(current_user: User = Depends(get_current_user)):
+async def get_active_session(current_user: Principal = Depends(get_current_user)):
     # Find active session
     session_doc = await db.sessions.find_one({
         "user_id": current_user.id,
         "end_time": None
-    })
+    }, SESSION_PROJECTION)
     
     if not session_doc:
         return None
@@ -531,7 +712,7 @@ async def get_active_session(current_user: User = Depends(get_current_user)):
     session = WorkSession(**session_doc)
     
     # Get breaks for this session
-    breaks = await db.breaks.find({"session_id": session.id}).to_list(length=None)
+    breaks = await db.breaks.find({"session_id": session.id}, BREAK_PROJECTION).to_list(length=None)
     
     # Find active break
     active_break = None
@@ -563,12 +744,12 @@ async def get_active_session(current_user: User = Depends(get_current_user)):
 
 # Break routes
 @api_router.post("/breaks/start", response_model=Break)
-async def start_break(current_user: User = Depends(get_current_user)):
+async def start_break(current_user: Principal = Depends(get_current_user)):
     # Find active session
     session_doc = await db.sessions.find_one({
         "user_id": current_user.id,
         "end_time": None
-    })
+    }, SESSION_PROJECTION)
     
     if not session_doc:
         raise HTTPException(status_code=404, detail="No active session found")
@@ -577,7 +758,7 @@ async def start_break(current_user: User = Depends(get_current_user)):
     active_break = await db.breaks.find_one({
         "session_id": session_doc["id"],
         "end_time": None
-    })
+    }, BREAK_PROJECTION)
     
     if active_break:
         raise HTTPException(status_code=409, detail="Break already active")
@@ -591,12 +772,12 @@ async def start_break(current_user: User = Depends(get_current_user)):
     return break_obj
 
 @api_router.post("/breaks/end")
-async def end_break(current_user: User = Depends(get_current_user)):
+async def end_break(current_user: Principal = Depends(get_current_user)):
     # Find active session
     session_doc = await db.sessions.find_one({
         "user_id": current_user.id,
         "end_time": None
-    })
+    }, SESSION_PROJECTION)
     
     if not session_doc:
         raise HTTPException(status_code=404, detail="No active session found")
@@ -605,7 +786,7 @@ async def end_break(current_user: User = Depends(get_current_user)):
     break_doc = await db.breaks.find_one({
         "session_id": session_doc["id"],
         "end_time": None
-    })
+    }, BREAK_PROJECTION)
     
     if not break_doc:
         raise HTTPException(status_code=404, detail="No active break found")
@@ -622,43 +803,47 @@ async def end_break(current_user: User = Depends(get_current_user)):
 async def get_session_history(
     from_date: str = None,
     to_date: str = None,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get session history for the user"""
     query = {"user_id": current_user.id, "end_time": {"$ne": None}}
     
     # Add date filters if provided
+    # Filter on the workday key rather than the UTC start time so the range matches the dates shown
+    work_date_range = {}
     if from_date:
-        start_date = datetime.fromisoformat(from_date).replace(tzinfo=timezone.utc)
-        query["start_time"] = {"$gte": start_date}
-    
+        work_date_range["$gte"] = date_or_400(from_date, "from_date")
     if to_date:
-        end_date = datetime.fromisoformat(to_date).replace(tzinfo=timezone.utc)
-        if "start_time" in query:
-            query["start_time"]["$lte"] = end_date
-        else:
-            query["start_time"] = {"$lte": end_date}
-    
-    sessions = await db.sessions.find(query).sort("start_time", -1).to_list(length=100)
+        work_date_range["$lte"] = date_or_400(to_date, "to_date")
+    if work_date_range:
+        query["work_date"] = work_date_range
+    
+    sessions = await db.sessions.find(query, SESSION_PROJECTION).sort("start_time", -1).to_list(length=100)
+    session_ids = [session_doc["id"] for session_doc in sessions]
+    
+    # Fetch break counts and timesheets for the whole page instead of two queries per session
+    break_counts = {
+        item["_id"]: item["count"]
+        for item in await db.breaks.aggregate([
+            {"$match": {"session_id": {"$in": session_ids}}},
+            {"$group": {"_id": "$session_id", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+    }
+    submitted_session_ids = set(await db.timesheets.distinct("session_id", {"session_id": {"$in": session_ids}}))
     
     history = []
     for session_doc in sessions:
         session = WorkSession(**session_doc)
-        
-        # Get breaks for this session
-        breaks = await db.breaks.find({"session_id": session.id}).to_list(length=None)
-        break_count = len(breaks)
+        break_count = break_counts.get(session.id, 0)
         total_break_seconds = session.total_break_seconds
-        
-        # Get timesheet
-        timesheet = await db.timesheets.find_one({"session_id": session.id})
+        timesheet = session.id in submitted_session_ids
         
         # Determine day type
         day_type = "Half Day" if session.is_half_day else "Full Work Day"
         
         history_item = {
             "id": session.id,
-            "date": session.start_time.date().isoformat(),
+            "date": session_date_key(session_doc),
             "login_time": session.start_time.strftime("%H:%M:%S"),
             "logout_time": session.end_time.strftime("%H:%M:%S") if session.end_time else None,
             "total_duration": str(timedelta(seconds=int((session.end_time - session.start_time).total_seconds()))) if session.end_time else None,
@@ -676,7 +861,7 @@ async def get_session_history(
 async def get_calendar_month(
     year: int,
     month: int,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get calendar data for a specific month with correct status colors"""
     from calendar import monthrange
@@ -690,26 +875,31 @@ async def get_calendar_month(
     # Get all sessions for the month for this user
     sessions = await db.sessions.find({
         "user_id": current_user.id,
-        "start_time": {"$gte": first_day, "$lte": last_day},
+        "work_date": {"$gte": first_day, "$lte": last_day},
         "end_time": {"$ne": None}
-    }).to_list(length=None)
+    }, CALENDAR_SESSION_PROJECTION).to_list(length=None)
     
     # Get all leaves for the month for this user
     leaves = await db.leaves.find({
         "user_id": current_user.id,
-        "date": {
-            "$gte": first_day.date().isoformat(),
-            "$lte": last_day.date().isoformat()
-        }
-    }).to_list(length=None)
+        "date": {"$gte": first_day, "$lte": last_day}
+    }, CALENDAR_LEAVE_PROJECTION).to_list(length=None)
     
     # Get holidays for the month (prioritize mandatory holidays)
     holidays = await db.holidays.find({
-        "date": {
-            "$gte": first_day.date().isoformat(),
-            "$lte": last_day.date().isoformat()
-        }
-    }).to_list(length=None)
+        "date": {"$gte": first_day, "$lte": last_day}
+    }, HOLIDAY_PROJECTION).to_list(length=None)
+    
+    # Index each day's session, leave and holiday once instead of scanning the lists for every day
+    sessions_by_date = {}
+    for session in sessions:
+        sessions_by_date.setdefault(session_date_key(session), session)
+    leaves_by_date = {}
+    for leave in leaves:
+        leaves_by_date.setdefault(date_key(leave["date"]), leave)
+    holidays_by_date = {}
+    for holiday in holidays:
+        holidays_by_date.setdefault(date_key(holiday["date"]), holiday)
     
     # Build calendar data with priority logic
     calendar_days = []
@@ -719,11 +909,7 @@ async def get_calendar_month(
         detail_info = {}
         
         # Priority 1: Check if user worked (Green) or had half-day (Orange)
-        user_session = None
-        for session in sessions:
-            if session["start_time"].date().isoformat() == date_str:
-                user_session = session
-                break
+        user_session = sessions_by_date.get(date_str)
         
         if user_session:
             if user_session.get("is_half_day"):
@@ -744,8 +930,8 @@ async def get_calendar_month(
                 }
         
         # Priority 2: Check if user was on leave (Red)
-        elif any(l["date"] == date_str for l in leaves):
-            leave = next(l for l in leaves if l["date"] == date_str)
+        elif date_str in leaves_by_date:
+            leave = leaves_by_date[date_str]
             if leave["type"] == "half":
                 day_type = "half-day"  # Orange (but this case should be covered above if there's a session)
                 detail_info = {
@@ -760,8 +946,8 @@ async def get_calendar_month(
                 }
         
         # Priority 3: Check if it's a holiday (Yellow) - prioritize mandatory holidays
-        elif any(h["date"] == date_str for h in holidays):
-            holiday = next(h for h in holidays if h["date"] == date_str)
+        elif date_str in holidays_by_date:
+            holiday = holidays_by_date[date_str]
             holiday_type = holiday.get("type", "Mandatory")  # Default to Mandatory for backward compatibility
             day_type = "holiday"  # Yellow
             detail_info = {
@@ -801,51 +987,51 @@ async def get_calendar_month(
 async def get_holidays(year: int):
     """Get holidays for a specific year"""
     holidays = await db.holidays.find({
-        "date": {"$regex": f"^{year}"}
-    }).to_list(length=None)
+        "date": {"$gte": datetime(year, 1, 1, tzinfo=timezone.utc), "$lt": datetime(year + 1, 1, 1, tzinfo=timezone.utc)}
+    }, HOLIDAY_PROJECTION).sort("date", 1).to_list(length=None)
+    for holiday in holidays:
+        holiday["date"] = date_key(holiday["date"])
     return holidays
 
 # Dashboard stats
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(
     year: int = None,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get dashboard statistics"""
     if not year:
         year = datetime.now().year
     
-    # Get leave counts by month
+    # Get leave counts by month with one grouped range query over the typed date
+    monthly_counts = await db.leaves.aggregate([
+        {"$match": {
+            "user_id": current_user.id,
+            "date": {"$gte": datetime(year, 1, 1, tzinfo=timezone.utc), "$lt": datetime(year + 1, 1, 1, tzinfo=timezone.utc)}
+        }},
+        {"$group": {"_id": {"$month": "$date"}, "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    counts_by_month = {item["_id"]: item["count"] for item in monthly_counts}
+    
     leaves_by_month = []
     for month in range(1, 13):
-        month_start = f"{year}-{month:02d}-01"
-        if month == 12:
-            month_end = f"{year + 1}-01-01"
-        else:
-            month_end = f"{year}-{month + 1:02d}-01"
-        
-        leave_count = await db.leaves.count_documents({
-            "user_id": current_user.id,
-            "date": {"$gte": month_start, "$lt": month_end}
-        })
-        
         leaves_by_month.append({
             "month": month,
             "month_name": cal.month_name[month],
-            "leaves_count": leave_count
+            "leaves_count": counts_by_month.get(month, 0)
         })
     
     return {"leaves_by_month": leaves_by_month}
 
 # Admin Panel routes
 @api_router.get("/admin/admin-users")
-async def get_all_admin_users(current_admin: User = Depends(get_current_admin)):
+async def get_all_admin_users(current_admin: Principal = Depends(get_current_admin)):
     """Get all admin users"""
-    admins = await db.users.find({"role": "admin"}).to_list(length=None)
+    admins = await db.users.find({"role": "admin"}, PRINCIPAL_PROJECTION).to_list(length=None)
     
     admin_list = []
     for admin_doc in admins:
-        admin_user = User(**admin_doc)
+        admin_user = Principal(**admin_doc)
         admin_stats = {
             "id": admin_user.id,
             "name": admin_user.name,
@@ -858,10 +1044,10 @@ async def get_all_admin_users(current_admin: User = Depends(get_current_admin)):
     return admin_list
 
 @api_router.post("/admin/create-admin")
-async def create_new_admin(admin_data: AdminCreate, current_admin: User = Depends(get_current_admin)):
+async def create_new_admin(admin_data: AdminCreate, current_admin: Principal = Depends(get_current_admin)):
     """Create a new admin user"""
     # Check if admin exists
-    existing_admin = await db.users.find_one({"email": admin_data.email})
+    existing_admin = await db.users.find_one({"email": admin_data.email}, EXISTS_PROJECTION)
     if existing_admin:
         raise HTTPException(status_code=400, detail="Admin with this email already exists")
     
@@ -878,7 +1064,7 @@ async def create_new_admin(admin_data: AdminCreate, current_admin: User = Depend
     return {"message": "Admin created successfully", "admin_id": new_admin.id}
 
 @api_router.get("/admin/holidays-management")
-async def get_holidays_management(current_admin: User = Depends(get_current_admin)):
+async def get_holidays_management(current_admin: Principal = Depends(get_current_admin)):
     """Get all holidays for management"""
     current_year = datetime.now().year
     holidays_docs = await db.holidays.find({}, {"_id": 0}).sort("date", 1).to_list(length=None)
@@ -889,7 +1075,7 @@ async def get_holidays_management(current_admin: User = Depends(get_current_admi
         holidays.append({
             "id": h.get("id", ""),
             "name": h.get("name", ""),
-            "date": h.get("date", ""),
+            "date": date_key(h.get("date")),
             "type": h.get("type", "Mandatory")
         })
     
@@ -910,17 +1096,18 @@ class HolidayUpdate(BaseModel):
     type: str
 
 @api_router.post("/admin/add-holiday")
-async def add_holiday(holiday_data: HolidayCreate, current_admin: User = Depends(get_current_admin)):
+async def add_holiday(holiday_data: HolidayCreate, current_admin: Principal = Depends(get_current_admin)):
     """Add a new holiday"""
+    holiday_date = date_or_400(holiday_data.date, "date")
     new_holiday = {
         "id": str(uuid.uuid4()),
-        "date": holiday_data.date,
+        "date": holiday_date,
         "name": holiday_data.name,
         "type": holiday_data.type
     }
     
     # Check if holiday already exists for this date
-    existing = await db.holidays.find_one({"date": holiday_data.date})
+    existing = await db.holidays.find_one({"date": holiday_date}, EXISTS_PROJECTION)
     if existing:
         raise HTTPException(status_code=400, detail="Holiday already exists for this date")
     
@@ -928,7 +1115,7 @@ async def add_holiday(holiday_data: HolidayCreate, current_admin: User = Depends
     return {"message": "Holiday added successfully", "holiday_id": new_holiday["id"]}
 
 @api_router.put("/admin/update-holiday/{holiday_id}")
-async def update_holiday(holiday_id: str, holiday_data: HolidayUpdate, current_admin: User = Depends(get_current_admin)):
+async def update_holiday(holiday_id: str, holiday_data: HolidayUpdate, current_admin: Principal = Depends(get_current_admin)):
     """Update a holiday"""
     # Check if holiday exists
     existing_holiday = await db.holidays.find_one({"id": holiday_id})
@@ -936,20 +1123,21 @@ async def update_holiday(holiday_id: str, holiday_data: HolidayUpdate, current_a
         raise HTTPException(status_code=404, detail="Holiday not found")
     
     # Check if date is already taken by another holiday
-    date_check = await db.holidays.find_one({"date": holiday_data.date, "id": {"$ne": holiday_id}})
+    holiday_date = date_or_400(holiday_data.date, "date")
+    date_check = await db.holidays.find_one({"date": holiday_date, "id": {"$ne": holiday_id}}, EXISTS_PROJECTION)
     if date_check:
         raise HTTPException(status_code=400, detail="Another holiday already exists for this date")
     
     # Update holiday
     await db.holidays.update_one(
         {"id": holiday_id},
-        {"$set": {"name": holiday_data.name, "date": holiday_data.date, "type": holiday_data.type}}
+        {"$set": {"name": holiday_data.name, "date": holiday_date, "type": holiday_data.type}}
     )
     
     return {"message": "Holiday updated successfully"}
 
 @api_router.delete("/admin/holiday/{holiday_id}")
-async def delete_holiday(holiday_id: str, current_admin: User = Depends(get_current_admin)):
+async def delete_holiday(holiday_id: str, current_admin: Principal = Depends(get_current_admin)):
     """Delete a holiday"""
     result = await db.holidays.delete_one({"id": holiday_id})
     if result.deleted_count == 0:
@@ -958,38 +1146,61 @@ async def delete_holiday(holiday_id: str, current_admin: User = Depends(get_curr
     return {"message": "Holiday deleted successfully"}
 
 @api_router.get("/admin/users-on-leave")
-async def get_users_on_leave(current_admin: User = Depends(get_current_admin)):
+async def get_users_on_leave(
+    days: int = 7,
+    from_date: str = None,
+    to_date: str = None,
+    department_id: str = None,
+    current_admin: Principal = Depends(get_current_admin)
+):
     """Get users currently on leave or recent leave data"""
-    now = datetime.now(timezone.utc)
-    today = now.date().isoformat()
+    today = local_work_date(datetime.now(timezone.utc), await get_organization_timezone())
     
-    # Get users with half-day leaves today
-    today_leaves = await db.leaves.find({"date": today}).to_list(length=None)
+    # Default window is the last `days` days up to today
+    window_end = date_or_400(to_date, "to_date") or today
+    window_start = date_or_400(from_date, "from_date") or today - timedelta(days=max(0, days))
     
-    # Get users with recent half-day applications (last 7 days)
-    week_ago = (now - timedelta(days=7)).date().isoformat()
-    recent_leaves = await db.leaves.find({
-        "date": {"$gte": week_ago, "$lte": today}
-    }).to_list(length=None)
+    query = {"date": {"$gte": window_start, "$lte": window_end}}
+    if department_id:
+        department_members = await db.employee_departments.find(
+            {"department_id": department_id}, {"_id": 0, "employee_id": 1}
+        ).to_list(length=None)
+        query["user_id"] = {"$in": [member["employee_id"] for member in department_members]}
+    
+    # One range query over the indexed date covers both today's count and the window
+    window_leaves = await db.leaves.find(
+        query,
+        {"_id": 0, "user_id": 1, "date": 1, "type": 1, "reason": 1, "status": 1}
+    ).sort("date", 1).to_list(length=None)
+    today_leaves = [leave for leave in window_leaves if date_key(leave["date"]) == date_key(today)]
+    
+    # Resolve all users with a single $in
+    user_ids = list({leave["user_id"] for leave in window_leaves})
+    users = await db.users.find(
+        {"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "name": 1, "email": 1}
+    ).to_list(length=None)
+    users_by_id = {user["id"]: user for user in users}
     
     # Get detailed user info for leaves
     leave_users = []
-    for leave in recent_leaves:
-        user = await db.users.find_one({"id": leave["user_id"]})
+    for leave in window_leaves:
+        user = users_by_id.get(leave["user_id"])
         if user:
             leave_users.append({
                 "user_id": leave["user_id"],
                 "user_name": user["name"],
                 "user_email": user["email"],
-                "leave_date": leave["date"],
-                "leave_type": leave["type"],
+                "leave_date": date_key(leave["date"]),
+                "leave_type": leave.get("type"),
                 "reason": leave.get("reason", "Half day application"),
                 "status": leave.get("status", "approved")
             })
     
     return {
         "users_on_leave_today": len(today_leaves),
-        "total_leaves_this_week": len(recent_leaves),
+        "total_leaves_this_week": len(window_leaves),
+        "total_leaves_in_window": len(window_leaves),
+        "window": {"from": date_key(window_start), "to": date_key(window_end)},
         "leave_details": leave_users
     }
 
@@ -998,7 +1209,7 @@ class AdminUpdate(BaseModel):
     email: EmailStr
 
 @api_router.put("/admin/update-admin/{admin_id}")
-async def update_admin(admin_id: str, admin_data: AdminUpdate, current_admin: User = Depends(get_current_admin)):
+async def update_admin(admin_id: str, admin_data: AdminUpdate, current_admin: Principal = Depends(get_current_admin)):
     """Update admin user details"""
     # Check if admin exists
     existing_admin = await db.users.find_one({"id": admin_id, "role": "admin"})
@@ -1006,7 +1217,7 @@ async def update_admin(admin_id: str, admin_data: AdminUpdate, current_admin: Us
         raise HTTPException(status_code=404, detail="Admin not found")
     
     # Check if email is already taken by another user
-    email_check = await db.users.find_one({"email": admin_data.email, "id": {"$ne": admin_id}})
+    email_check = await db.users.find_one({"email": admin_data.email, "id": {"$ne": admin_id}}, EXISTS_PROJECTION)
     if email_check:
         raise HTTPException(status_code=400, detail="Email already exists")
     
@@ -1019,7 +1230,7 @@ async def update_admin(admin_id: str, admin_data: AdminUpdate, current_admin: Us
     return {"message": "Admin updated successfully"}
 
 @api_router.delete("/admin/delete-admin/{admin_id}")
-async def delete_admin(admin_id: str, current_admin: User = Depends(get_current_admin)):
+async def delete_admin(admin_id: str, current_admin: Principal = Depends(get_current_admin)):
     """Delete admin user"""
     # Prevent deleting own account
     if admin_id == current_admin.id:
@@ -1042,26 +1253,128 @@ async def delete_admin(admin_id: str, current_admin: User = Depends(get_current_
     
     return {"message": "Admin deleted successfully"}
 
+# Employee directory search and keyset paging
+# Case-insensitive comparisons; the directory indexes are built with the same collation so searches and sorts use them
+DIRECTORY_COLLATION = Collation(locale="en", strength=2)
+DIRECTORY_SORT_FIELDS = ("name", "email", "joining_date")
+DIRECTORY_MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_directory_cursor(value, last_id: str) -> str:
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    return base64.urlsafe_b64encode(json.dumps([value, last_id]).encode("utf-8")).decode("ascii")
+
+def decode_directory_cursor(cursor: str) -> tuple:
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+def prefix_range(prefix: str) -> dict:
+    """Collation-aware prefix match; U+FFFF sorts after every character, so this is an index range scan"""
+    return {"$gte": prefix, "$lt": prefix + "\uffff"}
+
+async def build_directory_filter(
+    search: str = None, department_id: str = None, designation: str = None, status: str = None
+) -> dict:
+    """Mongo filter for the employee directory from the admin panel's search and filter parameters"""
+    clauses = [{"role": "employee", "is_deleted": {"$ne": True}}]
+    
+    if search and search.strip():
+        prefix = search.strip()
+        clauses.append({"$or": [
+            {"name": prefix_range(prefix)},
+            {"email": prefix_range(prefix)},
+            {"phone": prefix_range(prefix)}
+        ]})
+    
+    if department_id:
+        members = await db.employee_departments.find(
+            {"department_id": department_id}, {"_id": 0, "employee_id": 1}
+        ).to_list(length=None)
+        clauses.append({"id": {"$in": [member["employee_id"] for member in members]}})
+    
+    if designation:
+        clauses.append({"designation": designation})
+    
+    if status:
+        if status.lower() not in ("active", "inactive"):
+            raise HTTPException(status_code=400, detail="status must be Active or Inactive")
+        clauses.append({"status": status.capitalize()})
+    
+    return {"$and": clauses} if len(clauses) > 1 else clauses[0]
+
+def keyset_clause(field: str, descending: bool, value, last_id: str) -> dict:
+    """Rows strictly after (value, last_id) in (field, id) order; missing fields sort before strings"""
+    if not descending:
+        if value is None:
+            return {"$or": [{field: {"$ne": None}}, {field: None, "id": {"$gt": last_id}}]}
+        return {"$or": [{field: {"$gt": value}}, {field: value, "id": {"$gt": last_id}}]}
+    if value is None:
+        return {field: None, "id": {"$lt": last_id}}
+    return {"$or": [{field: {"$lt": value}}, {field: None}, {field: value, "id": {"$lt": last_id}}]}
+
+async def page_employee_directory(
+    base_filter: dict, fields: dict, sort: str = "name", cursor: str = None, limit: int = None
+) -> tuple:
+    """Fetch a sorted page of the directory, returning (documents, next_cursor or None)"""
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    if field not in DIRECTORY_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(DIRECTORY_SORT_FIELDS)}")
+    
+    query = base_filter
+    if cursor:
+        value, last_id = decode_directory_cursor(cursor)
+        query = {"$and": [base_filter, keyset_clause(field, descending, value, last_id)]}
+    
+    direction = DESCENDING if descending else ASCENDING
+    find = db.users.find(
+        query, {**fields, field: 1, "id": 1}, collation=DIRECTORY_COLLATION
+    ).sort([(field, direction), ("id", direction)])
+    
+    if not limit:
+        return await find.to_list(length=None), None
+    
+    page_size = max(1, min(limit, DIRECTORY_MAX_PAGE_SIZE))
+    docs = await find.limit(page_size + 1).to_list(length=None)
+    if len(docs) <= page_size:
+        return docs, None
+    docs = docs[:page_size]
+    return docs, encode_directory_cursor(docs[-1].get(field), docs[-1]["id"])
+
+def next_cursor_headers(next_cursor: str) -> dict:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
 @api_router.get("/admin/employees")
-async def get_all_employees(current_admin: User = Depends(get_current_admin)):
-    """Get all employees with detailed information"""
-    employees = await db.users.find({"role": "employee"}).to_list(length=None)
+async def get_all_employees(
+    search: str = None,
+    department_id: str = None,
+    designation: str = None,
+    status: str = None,
+    sort: str = "name",
+    cursor: str = None,
+    limit: int = None,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Get employees with detailed information; pass limit to page with the X-Next-Cursor header"""
+    base_filter = await build_directory_filter(search, department_id, designation, status)
+    employees, next_cursor = await page_employee_directory(base_filter, EMPLOYEE_LIST_PROJECTION, sort, cursor, limit)
+    employee_ids = [emp_doc["id"] for emp_doc in employees]
+    
+    # Count sessions and leaves for all employees in two grouped queries instead of two per employee
+    session_counts = await count_by_user(db.sessions, {"user_id": {"$in": employee_ids}, "end_time": {"$ne": None}})
+    leave_counts = await count_by_user(db.leaves, {"user_id": {"$in": employee_ids}})
     
     employee_list = []
     for emp_doc in employees:
-        # Calculate status based on release_date
-        status = "Active"
-        if emp_doc.get("release_date") and emp_doc["release_date"].strip():
-            try:
-                release_date = datetime.fromisoformat(emp_doc["release_date"])
-                if release_date <= datetime.now():
-                    status = "Inactive"
-            except:
-                pass
-        
-        # Get session and leave stats
-        total_sessions = await db.sessions.count_documents({"user_id": emp_doc["id"], "end_time": {"$ne": None}})
-        total_leaves = await db.leaves.count_documents({"user_id": emp_doc["id"]})
+        status = emp_doc.get("status") or "Active"
+        total_sessions = session_counts.get(emp_doc["id"], 0)
+        total_leaves = leave_counts.get(emp_doc["id"], 0)
         
         employee_data = {
             "id": emp_doc["id"],
@@ -1075,36 +1388,32 @@ async def get_all_employees(current_admin: User = Depends(get_current_admin)):
             "aadhar_card": emp_doc.get("aadhar_card", ""),
             "designation": emp_doc.get("designation", ""),
             "department": emp_doc.get("department", ""),
-            "joining_date": emp_doc.get("joining_date", ""),
-            "release_date": emp_doc.get("release_date", ""),
+            "joining_date": date_key(emp_doc.get("joining_date")),
+            "release_date": date_key(emp_doc.get("release_date")),
             "status": status,
-            "created_at": emp_doc["created_at"].isoformat(),
+            "created_at": emp_doc["created_at"],
             "total_sessions": total_sessions,
             "total_leaves": total_leaves
         }
         employee_list.append(employee_data)
     
-    return employee_list
+    return ORJSONResponse(employee_list, headers=next_cursor_headers(next_cursor))
 
 @api_router.post("/admin/create-employee")
-async def create_employee(emp_data: EmployeeCreate, current_admin: User = Depends(get_current_admin)):
+async def create_employee(emp_data: EmployeeCreate, current_admin: Principal = Depends(get_current_admin)):
     """Create a new employee"""
     # Check if employee exists
     existing_user = await db.users.find_one({
         "$or": [{"email": emp_data.email}, {"phone": emp_data.phone}]
-    })
+    }, EXISTS_PROJECTION)
     if existing_user:
         raise HTTPException(status_code=400, detail="Employee with this email or phone already exists")
     
-    # Calculate status based on release_date
-    status = "Active"
-    if emp_data.release_date and emp_data.release_date.strip():
-        try:
-            release_date = datetime.fromisoformat(emp_data.release_date)
-            if release_date <= datetime.now():
-                status = "Inactive"
-        except:
-            pass
+    # Release date is stored as a date and status is maintained on write so it can be filtered and counted in Mongo
+    release_date = release_date_or_400(emp_data.release_date)
+    joining_date = date_or_400(emp_data.joining_date, "joining_date")
+    employee_timezone = timezone_or_400(emp_data.timezone)
+    status = compute_employee_status(release_date)
     
     # Create employee user
     employee = User(
@@ -1112,7 +1421,8 @@ async def create_employee(emp_data: EmployeeCreate, current_admin: User = Depend
         email=emp_data.email,
         phone=emp_data.phone,
         password_hash=hash_password(emp_data.password),
-        role="employee"
+        role="employee",
+        timezone=employee_timezone
     )
     
     # Convert to dict and add additional fields
@@ -1125,40 +1435,43 @@ async def create_employee(emp_data: EmployeeCreate, current_admin: User = Depend
         "aadhar_card": emp_data.aadhar_card,
         "designation": emp_data.designation,
         "department": emp_data.department,
-        "joining_date": emp_data.joining_date,
-        "release_date": emp_data.release_date,
+        "joining_date": joining_date,
+        "release_date": release_date,
         "status": status
     })
     
     await db.users.insert_one(emp_dict)
+    
+    # Auto-assign new employee to default department
+    default_dept = await db.departments.find_one({"name": "General"})
+    if default_dept:
+        await db.employee_departments.bulk_write(
+            [department_assignment_upsert(employee.id, default_dept["id"])]
+        )
+    
     return {"message": "Employee created successfully", "employee_id": employee.id}
 
 @api_router.put("/admin/update-employee/{emp_id}")
-async def update_employee(emp_id: str, emp_data: EmployeeUpdate, current_admin: User = Depends(get_current_admin)):
+async def update_employee(emp_id: str, emp_data: EmployeeUpdate, current_admin: Principal = Depends(get_current_admin)):
     """Update employee details"""
     # Check if employee exists
-    existing_emp = await db.users.find_one({"id": emp_id, "role": "employee"})
+    existing_emp = await db.users.find_one({"id": emp_id, "role": "employee", "is_deleted": {"$ne": True}})
     if not existing_emp:
         raise HTTPException(status_code=404, detail="Employee not found")
     
     # Check if email/phone is already taken by another user
-    email_check = await db.users.find_one({"email": emp_data.email, "id": {"$ne": emp_id}})
+    email_check = await db.users.find_one({"email": emp_data.email, "id": {"$ne": emp_id}}, EXISTS_PROJECTION)
     if email_check:
         raise HTTPException(status_code=400, detail="Email already exists")
         
-    phone_check = await db.users.find_one({"phone": emp_data.phone, "id": {"$ne": emp_id}})
+    phone_check = await db.users.find_one({"phone": emp_data.phone, "id": {"$ne": emp_id}}, EXISTS_PROJECTION)
     if phone_check:
         raise HTTPException(status_code=400, detail="Phone number already exists")
     
-    # Calculate status based on release_date
-    status = "Active"
-    if emp_data.release_date and emp_data.release_date.strip():
-        try:
-            release_date = datetime.fromisoformat(emp_data.release_date)
-            if release_date <= datetime.now():
-                status = "Inactive"
-        except:
-            pass
+    release_date = release_date_or_400(emp_data.release_date)
+    joining_date = date_or_400(emp_data.joining_date, "joining_date")
+    employee_timezone = timezone_or_400(emp_data.timezone)
+    status = compute_employee_status(release_date)
     
     # Update employee
     update_data = {
@@ -1172,52 +1485,585 @@ async def update_employee(emp_id: str, emp_data: EmployeeUpdate, current_admin:
         "aadhar_card": emp_data.aadhar_card,
         "designation": emp_data.designation,
         "department": emp_data.department,
-        "joining_date": emp_data.joining_date,
-        "release_date": emp_data.release_date,
-        "status": status
+        "joining_date": joining_date,
+        "release_date": release_date,
+        "status": status,
+        "timezone": employee_timezone
     }
     
     await db.users.update_one({"id": emp_id}, {"$set": update_data})
     return {"message": "Employee updated successfully"}
 
+# Employee Deletion Jobs
+DELETION_BATCH_SIZE = int(os.environ.get("DELETION_BATCH_SIZE", "1000"))
+DELETION_LEASE_SECONDS = 60
+# (step, collection, user field) in dependency order; breaks and timesheets are removed with their sessions
+DELETION_STEPS = [
+    ("sessions", "sessions", "user_id"),
+    ("leaves", "leaves", "user_id"),
+    ("leave_applications", "leave_applications", "user_id"),
+    ("leave_ledger", "leave_ledger", "user_id"),
+    ("notifications", "notifications", "user_id"),
+    ("it_tickets", "it_tickets", "user_id"),
+    ("employee_departments", "employee_departments", "employee_id"),
+    ("managers", "managers", "employee_id"),
+    ("project_assignments", "project_assignments", "employee_id"),
+    ("project_memberships", "projects", "employee_ids"),
+    ("users", "users", "id")
+]
+background_tasks = set()
+
+async def touch_deletion_job(job_id: str, step: str = None, deleted: int = 0):
+    """Record progress on a deletion job and extend its lease"""
+    now = datetime.now(timezone.utc)
+    update = {"$set": {"updated_at": now, "lease_expires_at": now + timedelta(seconds=DELETION_LEASE_SECONDS)}}
+    if step:
+        update["$inc"] = {f"progress.{step}": deleted}
+    await db.deletion_jobs.update_one({"id": job_id}, update)
+
+async def delete_in_batches(collection, query: dict, job_id: str, step: str) -> int:
+    """Delete matching documents in DELETION_BATCH_SIZE chunks, recording progress after each chunk"""
+    total_deleted = 0
+    while True:
+        batch = await collection.find(query, {"_id": 1}).limit(DELETION_BATCH_SIZE).to_list(length=None)
+        if not batch:
+            return total_deleted
+        result = await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        total_deleted += result.deleted_count
+        await touch_deletion_job(job_id, step, result.deleted_count)
+
+async def delete_employee_sessions(employee_id: str, job_id: str):
+    """Delete an employee's sessions batch by batch, removing each batch's breaks and timesheets first"""
+    while True:
+        sessions = await db.sessions.find(
+            {"user_id": employee_id}, {"_id": 1, "id": 1}
+        ).limit(DELETION_BATCH_SIZE).to_list(length=None)
+        if not sessions:
+            return
+        session_ids = [session["id"] for session in sessions]
+        await delete_in_batches(db.breaks, {"session_id": {"$in": session_ids}}, job_id, "breaks")
+        await delete_in_batches(db.timesheets, {"session_id": {"$in": session_ids}}, job_id, "timesheets")
+        result = await db.sessions.delete_many({"_id": {"$in": [session["_id"] for session in sessions]}})
+        await touch_deletion_job(job_id, "sessions", result.deleted_count)
+
+async def claim_deletion_job(job_id: str) -> Optional[dict]:
+    """Claim a pending job, or a running job whose worker stopped renewing its lease"""
+    now = datetime.now(timezone.utc)
+    return await db.deletion_jobs.find_one_and_update(
+        {
+            "id": job_id,
+            "$or": [
+                {"status": {"$in": ["pending", "failed"]}},
+                {"status": "running", "lease_expires_at": {"$lt": now}}
+            ]
+        },
+        {"$set": {
+            "status": "running",
+            "updated_at": now,
+            "lease_expires_at": now + timedelta(seconds=DELETION_LEASE_SECONDS)
+        }},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def run_deletion_job(job_id: str, job: dict = None):
+    """Run (or resume) a cascading employee deletion, skipping steps already completed; pass job if already claimed"""
+    job = job or await claim_deletion_job(job_id)
+    if not job:
+        return
+    
+    employee_id = job["employee_id"]
+    try:
+        for step, collection_name, field in DELETION_STEPS:
+            if step in job.get("completed_steps", []):
+                continue
+            
+            await db.deletion_jobs.update_one({"id": job_id}, {"$set": {"current_step": step}})
+            if step == "sessions":
+                await delete_employee_sessions(employee_id, job_id)
+            elif step == "project_memberships":
+                result = await db.projects.update_many(
+                    {"employee_ids": employee_id}, {"$pull": {"employee_ids": employee_id}}
+                )
+                await touch_deletion_job(job_id, step, result.modified_count)
+            else:
+                await delete_in_batches(db[collection_name], {field: employee_id}, job_id, step)
+            
+            await db.deletion_jobs.update_one({"id": job_id}, {"$addToSet": {"completed_steps": step}})
+        
+        await db.deletion_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "completed", "current_step": None, "completed_at": datetime.now(timezone.utc)}}
+        )
+        await refresh_manager_resolution_map()
+    except Exception as e:
+        print(f"Error running deletion job {job_id}: {e}")
+        await db.deletion_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.now(timezone.utc)}}
+        )
+
+def start_background_task(coroutine):
+    """Run a coroutine in the background, keeping a reference so the task is not collected"""
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+def start_deletion_job(job_id: str, job: dict = None):
+    """Run a deletion job in the background"""
+    start_background_task(run_deletion_job(job_id, job))
+
+async def resume_deletion_jobs():
+    """Restart deletion jobs left unfinished by a previous process"""
+    unfinished = await db.deletion_jobs.find(
+        {"status": {"$in": ["pending", "running"]}}, {"_id": 0, "id": 1}
+    ).to_list(length=None)
+    for job in unfinished:
+        start_deletion_job(job["id"])
+
 @api_router.delete("/admin/delete-employee/{emp_id}")
-async def delete_employee(emp_id: str, current_admin: User = Depends(get_current_admin)):
+async def delete_employee(emp_id: str, current_admin: Principal = Depends(get_current_admin)):
     """Delete employee"""
     # Check if employee exists
-    existing_emp = await db.users.find_one({"id": emp_id, "role": "employee"})
+    existing_emp = await db.users.find_one({"id": emp_id, "role": "employee", "is_deleted": {"$ne": True}})
     if not existing_emp:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    # Delete employee and related data
-    await db.users.delete_one({"id": emp_id})
-    await db.sessions.delete_many({"user_id": emp_id})
-    await db.leaves.delete_many({"user_id": emp_id})
+    # Soft-delete first so reads exclude the employee immediately
+    now = datetime.now(timezone.utc)
+    await db.users.update_one({"id": emp_id}, {"$set": {"is_deleted": True, "deleted_at": now}})
+    
+    # Related data is removed by a background job
+    job = {
+        "id": str(uuid.uuid4()),
+        "employee_id": emp_id,
+        "status": "pending",
+        "current_step": None,
+        "completed_steps": [],
+        "progress": {},
+        "created_at": now,
+        "updated_at": now
+    }
+    await db.deletion_jobs.insert_one(job)
+    start_deletion_job(job["id"])
+    
+    return {"message": "Employee deleted successfully", "job_id": job["id"]}
+
+@api_router.get("/admin/deletion-jobs/{job_id}")
+async def get_deletion_job(job_id: str, current_admin: Principal = Depends(get_current_admin)):
+    """Get the progress of an employee deletion job"""
+    job = await db.deletion_jobs.find_one({"id": job_id}, {"_id": 0, "lease_expires_at": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    return job
+
+@api_router.post("/admin/deletion-jobs/{job_id}/resume")
+async def resume_deletion_job(job_id: str, current_admin: Principal = Depends(get_current_admin)):
+    """Resume a failed or stalled employee deletion job"""
+    job = await db.deletion_jobs.find_one({"id": job_id}, {"_id": 0, "status": 1})
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    if job["status"] == "completed":
+        raise HTTPException(status_code=400, detail="Deletion job already completed")
+    
+    # Claim before answering so a job another worker still holds the lease on is not reported as resumed
+    claimed = await claim_deletion_job(job_id)
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Deletion job is already running in another worker")
+    
+    start_deletion_job(job_id, claimed)
+    return {"message": "Deletion job resumed", "job_id": job_id}
+
+# Maintenance: orphan sweeping
+# collection -> (field, referenced collection, referenced field) references that must resolve
+ORPHAN_REFERENCES = {
+    "breaks": [("session_id", "sessions", "id")],
+    "timesheets": [("session_id", "sessions", "id")],
+    "employee_departments": [("employee_id", "users", "id"), ("department_id", "departments", "id")],
+    "managers": [("employee_id", "users", "id"), ("department_id", "departments", "id")],
+    "notifications": [("user_id", "users", "id")]
+}
+
+def reference_lookup(field: str, from_collection: str, foreign_field: str, as_field: str) -> dict:
+    """Build a $lookup stage that fetches at most one referenced document's _id"""
+    return {"$lookup": {
+        "from": from_collection,
+        "let": {"ref": f"${field}"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": [f"${foreign_field}", "$$ref"]}}},
+            {"$limit": 1},
+            {"$project": {"_id": 1}}
+        ],
+        "as": as_field
+    }}
+
+async def collection_storage_stats(name: str) -> dict:
+    """Get size figures for a collection, or zeros if it does not exist yet"""
+    try:
+        stats = await db.command("collStats", name)
+    except Exception:
+        return {"count": 0, "size": 0, "storage_size": 0, "avg_obj_size": 0}
+    return {
+        "count": stats.get("count", 0),
+        "size": stats.get("size", 0),
+        "storage_size": stats.get("storageSize", 0),
+        "avg_obj_size": stats.get("avgObjSize", 0)
+    }
+
+async def sweep_orphans(dry_run: bool = False, compact: bool = False) -> dict:
+    """Find and delete documents whose references no longer resolve, reporting reclaimed storage"""
+    report = {}
+    
+    for collection_name, references in ORPHAN_REFERENCES.items():
+        collection = db[collection_name]
+        stats_before = await collection_storage_stats(collection_name)
+        
+        pipeline = [
+            reference_lookup(field, from_collection, foreign_field, f"_ref{index}")
+            for index, (field, from_collection, foreign_field) in enumerate(references)
+        ]
+        pipeline.append({"$match": {"$or": [{f"_ref{index}": {"$size": 0}} for index in range(len(references))]}})
+        pipeline.append({"$project": {"_id": 1}})
+        
+        found = 0
+        deleted = 0
+        batch = []
+        async for doc in collection.aggregate(pipeline):
+            found += 1
+            batch.append(doc["_id"])
+            if len(batch) >= DELETION_BATCH_SIZE and not dry_run:
+                deleted += (await collection.delete_many({"_id": {"$in": batch}})).deleted_count
+                batch = []
+        if batch and not dry_run:
+            deleted += (await collection.delete_many({"_id": {"$in": batch}})).deleted_count
+        
+        report[collection_name] = {
+            "orphans_found": found,
+            "deleted": deleted,
+            "estimated_reclaimed_bytes": int(deleted * stats_before["avg_obj_size"]),
+            "storage_size_before": stats_before["storage_size"]
+        }
+    
+    # Project memberships pointing at users that no longer exist
+    dangling = await db.projects.aggregate([
+        {"$unwind": "$employee_ids"},
+        reference_lookup("employee_ids", "users", "id", "_employee"),
+        {"$match": {"_employee": {"$size": 0}}},
+        {"$group": {"_id": "$id", "missing_ids": {"$addToSet": "$employee_ids"}}}
+    ]).to_list(length=None)
+    
+    membership_report = {"orphans_found": sum(len(p["missing_ids"]) for p in dangling), "deleted": 0}
+    if dangling and not dry_run:
+        await db.projects.bulk_write([
+            UpdateOne({"id": p["_id"]}, {"$pull": {"employee_ids": {"$in": p["missing_ids"]}}})
+            for p in dangling
+        ], ordered=False)
+        membership_report["deleted"] = membership_report["orphans_found"]
+    report["projects.employee_ids"] = membership_report
+    
+    if compact and not dry_run:
+        for collection_name in ORPHAN_REFERENCES:
+            if not report[collection_name]["deleted"]:
+                continue
+            try:
+                await db.command("compact", collection_name)
+            except Exception as e:
+                report[collection_name]["compact_error"] = str(e)
+            report[collection_name]["storage_size_after"] = (await collection_storage_stats(collection_name))["storage_size"]
+    
+    if not dry_run and any(entry["deleted"] for entry in report.values()):
+        await refresh_manager_resolution_map()
+    
+    return {
+        "dry_run": dry_run,
+        "total_orphans": sum(entry["orphans_found"] for entry in report.values()),
+        "total_deleted": sum(entry["deleted"] for entry in report.values()),
+        "estimated_reclaimed_bytes": sum(entry.get("estimated_reclaimed_bytes", 0) for entry in report.values()),
+        "collections": report
+    }
+
+@api_router.post("/admin/maintenance/sweep-orphans")
+async def sweep_orphans_endpoint(
+    dry_run: bool = True,
+    compact: bool = False,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Detect (and unless dry_run, delete) orphaned documents across dependent collections"""
+    try:
+        return await sweep_orphans(dry_run=dry_run, compact=compact)
+    except Exception as e:
+        print(f"Error sweeping orphans: {e}")
+        raise HTTPException(status_code=500, detail="Failed to sweep orphaned documents")
+
+# Bulk Employee Import
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+IMPORT_HASH_WORKERS = int(os.environ.get("IMPORT_HASH_WORKERS", str(os.cpu_count() or 2)))
+password_hash_pool = None
+
+def get_password_hash_pool() -> ProcessPoolExecutor:
+    """Get the process pool used to hash imported passwords off the event loop"""
+    global password_hash_pool
+    if password_hash_pool is None:
+        password_hash_pool = ProcessPoolExecutor(max_workers=IMPORT_HASH_WORKERS)
+    return password_hash_pool
+
+async def iter_import_lines(request: Request):
+    """Yield decoded lines from the request body as it streams in"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def iter_import_records(request: Request, import_format: str):
+    """Yield (row_number, record, error) for each CSV or NDJSON record in the request body"""
+    row_number = 0
+    if import_format == "ndjson":
+        async for line in iter_import_lines(request):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Each line must be a JSON object"
+                continue
+            yield row_number, record, None
+        return
+    
+    header = None
+    pending_line = ""
+    async for line in iter_import_lines(request):
+        # Quoted fields may contain newlines; keep reading until the quotes balance
+        pending_line = f"{pending_line}\n{line}" if pending_line else line
+        if pending_line.count('"') % 2:
+            continue
+        line, pending_line = pending_line, ""
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+        row_number += 1
+        if len(values) > len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row_number, dict(zip(header, values)), None
+    
+    if pending_line:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+async def import_employee_batch(batch: list, seen_emails: set, seen_phones: set, department_ids: dict, results: list):
+    """Validate, dedupe, hash and insert one batch of imported employee rows"""
+    valid_rows = []
+    for row_number, record, error in batch:
+        if error:
+            results.append({"row": row_number, "status": "error", "error": error})
+            continue
+        try:
+            emp_data = EmployeeCreate(**record)
+        except ValidationError as e:
+            results.append({"row": row_number, "status": "error", "error": str(e.errors()[0].get("msg", "Invalid row"))})
+            continue
+        try:
+            release_date = parse_release_date(emp_data.release_date)
+            joining_date = to_utc_date(emp_data.joining_date)
+        except ValueError:
+            results.append({"row": row_number, "status": "error", "email": emp_data.email, "error": "Invalid release_date or joining_date, expected YYYY-MM-DD"})
+            continue
+        if emp_data.timezone.strip():
+            try:
+                get_zone(emp_data.timezone.strip())
+            except ValueError:
+                results.append({"row": row_number, "status": "error", "email": emp_data.email, "error": f"Invalid timezone {emp_data.timezone!r}"})
+                continue
+        if emp_data.email in seen_emails or emp_data.phone in seen_phones:
+            results.append({"row": row_number, "status": "error", "email": emp_data.email, "error": "Duplicate email or phone in import"})
+            continue
+        seen_emails.add(emp_data.email)
+        seen_phones.add(emp_data.phone)
+        valid_rows.append((row_number, emp_data, release_date, joining_date))
+    
+    if not valid_rows:
+        return
+    
+    # One $in lookup for the whole batch instead of a find_one per employee
+    existing_users = await db.users.find(
+        {"$or": [
+            {"email": {"$in": [row[1].email for row in valid_rows]}},
+            {"phone": {"$in": [row[1].phone for row in valid_rows]}}
+        ]},
+        {"_id": 0, "email": 1, "phone": 1}
+    ).to_list(length=None)
+    existing_emails = {user["email"] for user in existing_users}
+    existing_phones = {user["phone"] for user in existing_users}
+    
+    new_rows = []
+    for row in valid_rows:
+        row_number, emp_data = row[0], row[1]
+        if emp_data.email in existing_emails or emp_data.phone in existing_phones:
+            results.append({"row": row_number, "status": "error", "email": emp_data.email, "error": "Employee with this email or phone already exists"})
+        else:
+            new_rows.append(row)
+    
+    if not new_rows:
+        return
+    
+    # bcrypt is CPU bound; spread the batch across the process pool
+    loop = asyncio.get_running_loop()
+    pool = get_password_hash_pool()
+    password_hashes = await asyncio.gather(*[
+        loop.run_in_executor(pool, hash_password, row[1].password) for row in new_rows
+    ])
+    
+    employee_docs = []
+    for (row_number, emp_data, release_date, joining_date), password_hash in zip(new_rows, password_hashes):
+        employee = User(
+            name=emp_data.name,
+            email=emp_data.email,
+            phone=emp_data.phone,
+            password_hash=password_hash,
+            role="employee",
+            timezone=emp_data.timezone.strip()
+        )
+        emp_dict = employee.dict()
+        emp_dict.update({
+            "dob": emp_data.dob,
+            "blood_group": emp_data.blood_group,
+            "emergency_contact": emp_data.emergency_contact,
+            "address": emp_data.address,
+            "aadhar_card": emp_data.aadhar_card,
+            "designation": emp_data.designation,
+            "department": emp_data.department,
+            "joining_date": joining_date,
+            "release_date": release_date,
+            "status": compute_employee_status(release_date)
+        })
+        employee_docs.append(emp_dict)
+    
+    failed_indexes = {}
+    try:
+        await db.users.insert_many(employee_docs, ordered=False)
+    except BulkWriteError as e:
+        # Rows that lost a race with a concurrent insert fail on the unique indexes
+        failed_indexes = {error["index"]: error.get("errmsg", "Insert failed") for error in e.details.get("writeErrors", [])}
+    
+    assignments = []
+    for index, ((row_number, emp_data, _, _), emp_dict) in enumerate(zip(new_rows, employee_docs)):
+        if index in failed_indexes:
+            results.append({"row": row_number, "status": "error", "email": emp_data.email, "error": "Employee with this email or phone already exists"})
+            continue
+        results.append({"row": row_number, "status": "created", "email": emp_data.email, "employee_id": emp_dict["id"]})
+        
+        department_id = department_ids.get(emp_data.department) or department_ids.get("General")
+        if department_id:
+            assignments.append({
+                "id": str(uuid.uuid4()),
+                "employee_id": emp_dict["id"],
+                "department_id": department_id,
+                "assigned_at": datetime.now(timezone.utc)
+            })
     
-    return {"message": "Employee deleted successfully"}
+    if assignments:
+        await db.employee_departments.insert_many(assignments, ordered=False)
+
+@api_router.post("/admin/import-employees")
+async def import_employees(
+    request: Request,
+    format: str = None,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Bulk import employees from a CSV or NDJSON request body"""
+    try:
+        import_format = (format or "").lower()
+        if not import_format:
+            content_type = request.headers.get("content-type", "")
+            import_format = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+        if import_format not in ("csv", "ndjson"):
+            raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+        
+        # Employees are assigned to the department named in the row, or to General
+        departments = await db.departments.find({}, {"_id": 0, "id": 1, "name": 1}).to_list(length=None)
+        department_ids = {dept["name"]: dept["id"] for dept in departments}
+        
+        results = []
+        seen_emails = set()
+        seen_phones = set()
+        batch = []
+        async for row in iter_import_records(request, import_format):
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await import_employee_batch(batch, seen_emails, seen_phones, department_ids, results)
+                batch = []
+        if batch:
+            await import_employee_batch(batch, seen_emails, seen_phones, department_ids, results)
+        
+        results.sort(key=lambda result: result["row"])
+        created_count = len([r for r in results if r["status"] == "created"])
+        if created_count:
+            await refresh_manager_resolution_map()
+        
+        return {
+            "message": f"Imported {created_count} employees",
+            "total_rows": len(results),
+            "created": created_count,
+            "failed": len(results) - created_count,
+            "results": results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error importing employees: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import employees")
 
 # Department Management
+def department_count_lookup(collection: str, as_field: str) -> dict:
+    """Build a $lookup stage counting a collection's documents per department"""
+    return {"$lookup": {
+        "from": collection,
+        "let": {"dept_id": "$id"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$department_id", "$$dept_id"]}}},
+            {"$count": "count"}
+        ],
+        "as": as_field
+    }}
+
 @api_router.get("/admin/departments")
-async def get_all_departments(current_admin: User = Depends(get_current_admin)):
+async def get_all_departments(current_admin: Principal = Depends(get_current_admin)):
     """Get all departments"""
-    departments = await db.departments.find({}, {"_id": 0}).to_list(length=None)
-    
-    # Add employee and project counts
-    for dept in departments:
-        managers_count = await db.managers.count_documents({"department_id": dept["id"]})
-        projects_count = await db.projects.count_documents({"department_id": dept["id"]})
-        dept["managers_count"] = managers_count
-        dept["projects_count"] = projects_count
+    # Add manager, project and employee counts in the same round trip
+    departments = await db.departments.aggregate([
+        {"$project": {"_id": 0}},
+        department_count_lookup("managers", "managers_count"),
+        department_count_lookup("projects", "projects_count"),
+        department_count_lookup("employee_departments", "employees_count"),
+        {"$set": {
+            "managers_count": {"$ifNull": [{"$first": "$managers_count.count"}, 0]},
+            "projects_count": {"$ifNull": [{"$first": "$projects_count.count"}, 0]},
+            "employees_count": {"$ifNull": [{"$first": "$employees_count.count"}, 0]}
+        }}
+    ]).to_list(length=None)
     
     return departments
 
 @api_router.post("/admin/create-department")
-async def create_department(dept_data: DepartmentCreate, current_admin: User = Depends(get_current_admin)):
+async def create_department(dept_data: DepartmentCreate, current_admin: Principal = Depends(get_current_admin)):
     """Create a new department"""
     new_dept = {
         "id": str(uuid.uuid4()),
         "name": dept_data.name,
         "description": dept_data.description,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     # Check if department already exists
@@ -1230,35 +2076,37 @@ async def create_department(dept_data: DepartmentCreate, current_admin: User = D
 
 # Manager Management
 @api_router.get("/admin/managers")
-async def get_all_managers(current_admin: User = Depends(get_current_admin)):
+async def get_all_managers(current_admin: Principal = Depends(get_current_admin)):
     """Get all managers with their details"""
-    managers = await db.managers.find({}, {"_id": 0}).to_list(length=None)
-    
-    manager_list = []
-    for manager in managers:
-        # Get employee details
-        employee = await db.users.find_one({"id": manager["employee_id"]})
-        department = await db.departments.find_one({"id": manager["department_id"]})
-        
-        if employee and department:
-            manager_info = {
-                "id": manager["id"],
-                "employee_id": manager["employee_id"],
-                "employee_name": employee["name"],
-                "employee_email": employee["email"],
-                "department_id": manager["department_id"],
-                "department_name": department["name"],
-                "created_at": manager.get("created_at", "")
-            }
-            manager_list.append(manager_info)
+    # Join employee and department details in one aggregation instead of two find_one calls per manager
+    manager_list = await db.managers.aggregate([
+        {"$lookup": {"from": "users", "localField": "employee_id", "foreignField": "id", "as": "employee"}},
+        {"$unwind": "$employee"},
+        # Soft-deleted employees stay hidden while their deletion job is still running
+        {"$match": {"employee.is_deleted": {"$ne": True}}},
+        {"$lookup": {"from": "departments", "localField": "department_id", "foreignField": "id", "as": "department"}},
+        {"$unwind": "$department"},
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            "employee_id": 1,
+            "employee_name": "$employee.name",
+            "employee_email": "$employee.email",
+            "department_id": 1,
+            "department_name": "$department.name",
+            "created_at": {"$ifNull": ["$created_at", ""]}
+        }}
+    ]).to_list(length=None)
     
     return manager_list
 
 @api_router.post("/admin/create-manager")
-async def create_manager(manager_data: ManagerCreate, current_admin: User = Depends(get_current_admin)):
+async def create_manager(manager_data: ManagerCreate, current_admin: Principal = Depends(get_current_admin)):
     """Assign an employee as manager"""
     # Check if employee exists and is not admin
-    employee = await db.users.find_one({"id": manager_data.employee_id, "role": "employee"})
+    employee = await db.users.find_one(
+        {"id": manager_data.employee_id, "role": "employee", "is_deleted": {"$ne": True}}, EXISTS_PROJECTION
+    )
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
@@ -1280,27 +2128,60 @@ async def create_manager(manager_data: ManagerCreate, current_admin: User = Depe
     }
     
     await db.managers.insert_one(new_manager)
+    await refresh_manager_resolution_map()
     return {"message": "Manager assigned successfully", "manager_id": new_manager["id"]}
 
 # Project Management
+async def find_missing_employee_ids(employee_ids: List[str]) -> List[str]:
+    """Return the ids that do not belong to an existing employee, using a single $in query"""
+    requested_ids = list(dict.fromkeys(employee_ids))
+    if not requested_ids:
+        return []
+    employees = await db.users.find(
+        {"id": {"$in": requested_ids}, "role": "employee", "is_deleted": {"$ne": True}}, {"_id": 0, "id": 1}
+    ).to_list(length=None)
+    found_ids = {emp["id"] for emp in employees}
+    return [emp_id for emp_id in requested_ids if emp_id not in found_ids]
+
 @api_router.get("/admin/projects")
-async def get_all_projects(current_admin: User = Depends(get_current_admin)):
+async def get_all_projects(current_admin: Principal = Depends(get_current_admin)):
     """Get all projects with their details"""
     projects = await db.projects.find({}, {"_id": 0}).to_list(length=None)
     
+    # Load every referenced department, manager and user once instead of per project and per member
+    departments = {
+        department["id"]: department
+        for department in await db.departments.find(
+            {"id": {"$in": list({project["department_id"] for project in projects})}}, {"_id": 0}
+        ).to_list(length=None)
+    }
+    managers = {
+        manager["id"]: manager
+        for manager in await db.managers.find(
+            {"id": {"$in": list({project["manager_id"] for project in projects})}}, {"_id": 0}
+        ).to_list(length=None)
+    }
+    user_ids = {manager["employee_id"] for manager in managers.values()}
+    for project in projects:
+        user_ids.update(project.get("employee_ids", []))
+    users = {
+        user["id"]: user
+        for user in await db.users.find(
+            {"id": {"$in": list(user_ids)}}, {"_id": 0, "id": 1, "name": 1, "email": 1}
+        ).to_list(length=None)
+    }
+    
     project_list = []
     for project in projects:
-        # Get department and manager details
-        department = await db.departments.find_one({"id": project["department_id"]})
-        manager = await db.managers.find_one({"id": project["manager_id"]})
+        department = departments.get(project["department_id"])
+        manager = managers.get(project["manager_id"])
         
         if department and manager:
-            manager_employee = await db.users.find_one({"id": manager["employee_id"]})
+            manager_employee = users.get(manager["employee_id"])
             
-            # Get assigned employees
             assigned_employees = []
             for emp_id in project.get("employee_ids", []):
-                emp = await db.users.find_one({"id": emp_id})
+                emp = users.get(emp_id)
                 if emp:
                     assigned_employees.append({
                         "id": emp["id"],
@@ -1328,7 +2209,7 @@ async def get_all_projects(current_admin: User = Depends(get_current_admin)):
     return project_list
 
 @api_router.post("/admin/create-project")
-async def create_project(project_data: ProjectCreate, current_admin: User = Depends(get_current_admin)):
+async def create_project(project_data: ProjectCreate, current_admin: Principal = Depends(get_current_admin)):
     """Create a new project"""
     # Check if department and manager exist
     department = await db.departments.find_one({"id": project_data.department_id})
@@ -1340,10 +2221,9 @@ async def create_project(project_data: ProjectCreate, current_admin: User = Depe
         raise HTTPException(status_code=404, detail="Manager not found")
     
     # Verify all employee IDs exist
-    for emp_id in project_data.employee_ids:
-        employee = await db.users.find_one({"id": emp_id, "role": "employee"})
-        if not employee:
-            raise HTTPException(status_code=404, detail=f"Employee {emp_id} not found")
+    missing_ids = await find_missing_employee_ids(project_data.employee_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Employees not found: {', '.join(missing_ids)}")
     
     new_project = {
         "id": str(uuid.uuid4()),
@@ -1359,17 +2239,66 @@ async def create_project(project_data: ProjectCreate, current_admin: User = Depe
     }
     
     await db.projects.insert_one(new_project)
+    await refresh_manager_resolution_entries(new_project["employee_ids"])
     return {"message": "Project created successfully", "project_id": new_project["id"]}
 
+@api_router.put("/admin/projects/{project_id}/members")
+async def update_project_members(
+    project_id: str,
+    membership_data: ProjectMembershipUpdate,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Add and remove project members"""
+    project = await db.projects.find_one({"id": project_id}, {"_id": 0, "id": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    missing_ids = await find_missing_employee_ids(membership_data.add_employee_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Employees not found: {', '.join(missing_ids)}")
+    
+    # $addToSet and $pull cannot target the same field in one update, so send both as one ordered batch
+    operations = []
+    if membership_data.add_employee_ids:
+        operations.append(UpdateOne(
+            {"id": project_id},
+            {"$addToSet": {"employee_ids": {"$each": membership_data.add_employee_ids}}}
+        ))
+    if membership_data.remove_employee_ids:
+        operations.append(UpdateOne(
+            {"id": project_id},
+            {"$pull": {"employee_ids": {"$in": membership_data.remove_employee_ids}}}
+        ))
+    if operations:
+        await db.projects.bulk_write(operations)
+        await refresh_manager_resolution_entries(
+            membership_data.add_employee_ids + membership_data.remove_employee_ids
+        )
+    
+    updated_project = await db.projects.find_one({"id": project_id}, {"_id": 0, "employee_ids": 1})
+    return {
+        "message": "Project members updated successfully",
+        "employee_ids": updated_project.get("employee_ids", []) if updated_project else []
+    }
+
 # Tree Structure for Manager Assignments
 @api_router.get("/admin/organization-tree")
-async def get_organization_tree(current_admin: User = Depends(get_current_admin)):
+async def get_organization_tree(current_admin: Principal = Depends(get_current_admin)):
     """Get complete organization tree structure"""
     # Get all data
     departments = await db.departments.find({}, {"_id": 0}).to_list(length=None)
     managers = await db.managers.find({}, {"_id": 0}).to_list(length=None)
     projects = await db.projects.find({}, {"_id": 0}).to_list(length=None)
-    employees = await db.users.find({"role": "employee"}, {"_id": 0}).to_list(length=None)
+    employees = await db.users.find({"role": "employee", "is_deleted": {"$ne": True}}, {"_id": 0}).to_list(length=None)
+    
+    # Index by id and parent so the tree is built in linear time
+    employees_by_id = {employee["id"]: employee for employee in employees}
+    managers_by_department = {}
+    for manager in managers:
+        managers_by_department.setdefault(manager["department_id"], []).append(manager)
+    projects_by_manager = {}
+    for project in projects:
+        projects_by_manager.setdefault(project["manager_id"], []).append(project)
     
     # Build tree structure
     tree = []
@@ -1384,11 +2313,11 @@ async def get_organization_tree(current_admin: User = Depends(get_current_admin)
         }
         
         # Find managers in this department
-        dept_managers = [m for m in managers if m["department_id"] == department["id"]]
+        dept_managers = managers_by_department.get(department["id"], [])
         
         for manager in dept_managers:
             # Get manager employee details
-            manager_employee = next((e for e in employees if e["id"] == manager["employee_id"]), None)
+            manager_employee = employees_by_id.get(manager["employee_id"])
             if not manager_employee:
                 continue
             
@@ -1402,12 +2331,12 @@ async def get_organization_tree(current_admin: User = Depends(get_current_admin)
             }
             
             # Find projects managed by this manager
-            manager_projects = [p for p in projects if p["manager_id"] == manager["id"]]
+            manager_projects = projects_by_manager.get(manager["id"], [])
             
             for project in manager_projects:
                 project_employees = []
                 for emp_id in project.get("employee_ids", []):
-                    employee = next((e for e in employees if e["id"] == emp_id), None)
+                    employee = employees_by_id.get(emp_id)
                     if employee:
                         project_employees.append({
                             "id": employee["id"],
@@ -1435,7 +2364,7 @@ async def get_organization_tree(current_admin: User = Depends(get_current_admin)
         
         tree.append(dept_node)
     
-    return {
+    return ORJSONResponse({
         "tree": tree,
         "summary": {
             "departments": len(departments),
@@ -1443,11 +2372,11 @@ async def get_organization_tree(current_admin: User = Depends(get_current_admin)
             "projects": len(projects),
             "employees": len(employees)
         }
-    }
+    })
 
 # Organization Settings Management
 @api_router.get("/admin/organization-settings")
-async def get_organization_settings(current_admin: User = Depends(get_current_admin)):
+async def get_organization_settings(current_admin: Principal = Depends(get_current_admin)):
     """Get organization settings"""
     settings = await db.organization_settings.find_one({}, {"_id": 0})
     
@@ -1464,6 +2393,7 @@ async def get_organization_settings(current_admin: User = Depends(get_current_ad
             "address": "",
             "phone": "",
             "website": "",
+            "timezone": ORGANIZATION_TIMEZONE,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.organization_settings.insert_one(default_settings)
@@ -1472,7 +2402,7 @@ async def get_organization_settings(current_admin: User = Depends(get_current_ad
     return settings
 
 @api_router.put("/admin/organization-settings")
-async def update_organization_settings(settings_data: OrganizationUpdate, current_admin: User = Depends(get_current_admin)):
+async def update_organization_settings(settings_data: OrganizationUpdate, current_admin: Principal = Depends(get_current_admin)):
     """Update organization settings"""
     existing_settings = await db.organization_settings.find_one({})
     
@@ -1487,6 +2417,8 @@ async def update_organization_settings(settings_data: OrganizationUpdate, curren
         "website": settings_data.website,
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
+    if settings_data.timezone is not None:
+        update_data["timezone"] = timezone_or_400(settings_data.timezone) or ORGANIZATION_TIMEZONE
     
     if existing_settings:
         await db.organization_settings.update_one(
@@ -1501,10 +2433,13 @@ async def update_organization_settings(settings_data: OrganizationUpdate, curren
         })
         await db.organization_settings.insert_one(update_data)
     
+    # Apply a timezone change in this worker now; other workers pick it up within the cache TTL
+    organization_timezone_cache["refreshed_at"] = None
+    
     return {"message": "Organization settings updated successfully"}
 
 @api_router.post("/admin/upload-logo")
-async def upload_company_logo(current_admin: User = Depends(get_current_admin)):
+async def upload_company_logo(current_admin: Principal = Depends(get_current_admin)):
     """Upload company logo (placeholder for file upload)"""
     # For now, we'll use a placeholder. In production, you'd handle actual file upload
     logo_data = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=="
@@ -1527,12 +2462,14 @@ async def get_public_organization_info():
     if not settings:
         return {
             "company_name": "Work Hours Tracker",
-            "company_logo": ""
+            "company_logo": "",
+            "timezone": ORGANIZATION_TIMEZONE
         }
     
     return {
         "company_name": settings.get("company_name", "Work Hours Tracker"),
-        "company_logo": settings.get("company_logo", "")
+        "company_logo": settings.get("company_logo", ""),
+        "timezone": settings.get("timezone") or ORGANIZATION_TIMEZONE
     }
 
 class ManagerAssignment(BaseModel):
@@ -1540,10 +2477,22 @@ class ManagerAssignment(BaseModel):
     employee_ids: List[str]
 
 @api_router.get("/admin/manager-assignments")
-async def get_manager_assignments(current_admin: User = Depends(get_current_admin)):
-    """Get all manager assignments"""
+async def get_manager_assignments(
+    search: str = None,
+    department_id: str = None,
+    designation: str = None,
+    status: str = None,
+    sort: str = "name",
+    cursor: str = None,
+    limit: int = None,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Get manager assignments; pass limit to page with the X-Next-Cursor header"""
     # For now, return a simple structure. In a real system, you'd have a managers table
-    employees = await db.users.find({"role": "employee"}).to_list(length=None)
+    base_filter = await build_directory_filter(search, department_id, designation, status)
+    employees, next_cursor = await page_employee_directory(
+        base_filter, MANAGER_ASSIGNMENT_PROJECTION, sort, cursor, limit
+    )
     
     assignments = []
     for emp in employees:
@@ -1555,25 +2504,51 @@ async def get_manager_assignments(current_admin: User = Depends(get_current_admi
             "manager_name": emp.get("manager_name", "Unassigned")
         })
     
-    return {
-        "total_employees": len(employees),
-        "assigned_employees": len([e for e in assignments if e["manager_id"]]),
-        "unassigned_employees": len([e for e in assignments if not e["manager_id"]]),
+    if limit or cursor:
+        # Totals cover every matching employee, not just this page
+        totals = await db.users.aggregate([
+            {"$match": base_filter},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "assigned": {"$sum": {"$cond": [{"$ifNull": ["$manager_id", False]}, 1, 0]}}
+            }}
+        ], collation=DIRECTORY_COLLATION).to_list(length=1)
+        total_employees = totals[0]["total"] if totals else 0
+        assigned_employees = totals[0]["assigned"] if totals else 0
+    else:
+        total_employees = len(assignments)
+        assigned_employees = len([e for e in assignments if e["manager_id"]])
+    
+    return ORJSONResponse({
+        "total_employees": total_employees,
+        "assigned_employees": assigned_employees,
+        "unassigned_employees": total_employees - assigned_employees,
         "assignments": assignments
-    }
+    }, headers=next_cursor_headers(next_cursor))
 
 @api_router.post("/admin/assign-manager")
-async def assign_manager(assignment: ManagerAssignment, current_admin: User = Depends(get_current_admin)):
-    """Assign a manager to employees"""
-    # Get manager info
-    manager = await db.users.find_one({"id": assignment.manager_id})
+async def assign_manager(assignment: ManagerAssignment, current_admin: Principal = Depends(get_current_admin)):
+    """Assign a reporting manager to employees (users.manager_id).
+    
+    This is display-only: leave routing resolves approvers from department managers and project managers
+    (see build_manager_resolution), so it does not touch the manager resolution map.
+    """
+    # The manager must be an active employee
+    manager = await db.users.find_one(
+        {"id": assignment.manager_id, "role": "employee", "is_deleted": {"$ne": True}}, USER_SUMMARY_PROJECTION
+    )
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
     
-    # Update employees with manager assignment
-    for emp_id in assignment.employee_ids:
-        await db.users.update_one(
-            {"id": emp_id},
+    # Assign the employees that exist and report the rest, as the bulk department assignment does
+    missing_ids = await find_missing_employee_ids(assignment.employee_ids)
+    matched_ids = [emp_id for emp_id in dict.fromkeys(assignment.employee_ids) if emp_id not in missing_ids]
+    
+    matched_count = 0
+    if matched_ids:
+        result = await db.users.update_many(
+            {"id": {"$in": matched_ids}, "is_deleted": {"$ne": True}},
             {
                 "$set": {
                     "manager_id": assignment.manager_id,
@@ -1581,27 +2556,47 @@ async def assign_manager(assignment: ManagerAssignment, current_admin: User = De
                 }
             }
         )
+        matched_count = result.matched_count
     
-    return {"message": f"Manager {manager['name']} assigned to {len(assignment.employee_ids)} employees"}
+    return {
+        "message": f"Manager {manager['name']} assigned to {matched_count} employees",
+        "updated_count": matched_count,
+        "missing_ids": missing_ids
+    }
 
 @api_router.get("/admin/users")
-async def get_all_users(current_admin: User = Depends(get_current_admin)):
-    """Get all users for admin panel"""
-    users = await db.users.find({"role": "employee"}).to_list(length=None)
+async def get_all_users(
+    search: str = None,
+    department_id: str = None,
+    designation: str = None,
+    status: str = None,
+    sort: str = "name",
+    cursor: str = None,
+    limit: int = None,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Get users for admin panel; pass limit to page with the X-Next-Cursor header"""
+    base_filter = await build_directory_filter(search, department_id, designation, status)
+    users, next_cursor = await page_employee_directory(base_filter, PRINCIPAL_PROJECTION, sort, cursor, limit)
+    user_ids = [user_doc["id"] for user_doc in users]
+    
+    # Session count and latest login per user in one grouped query instead of two queries per user
+    session_stats = {
+        item["_id"]: item
+        for item in await db.sessions.aggregate([
+            {"$match": {"user_id": {"$in": user_ids}, "end_time": {"$ne": None}}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}, "last_start": {"$max": "$start_time"}}}
+        ]).to_list(length=None)
+    }
+    leave_counts = await count_by_user(db.leaves, {"user_id": {"$in": user_ids}})
     
     user_list = []
     for user_doc in users:
-        user = User(**user_doc)
-        
-        # Get user's session stats
-        total_sessions = await db.sessions.count_documents({"user_id": user.id, "end_time": {"$ne": None}})
-        total_leaves = await db.leaves.count_documents({"user_id": user.id})
-        
-        # Get recent session
-        recent_session = await db.sessions.find_one(
-            {"user_id": user.id, "end_time": {"$ne": None}},
-            sort=[("start_time", -1)]
-        )
+        user = Principal(**user_doc)
+        sessions = session_stats.get(user.id)
+        total_sessions = sessions["count"] if sessions else 0
+        total_leaves = leave_counts.get(user.id, 0)
+        recent_session = {"start_time": sessions["last_start"]} if sessions else None
         
         user_stats = {
             "id": user.id,
@@ -1616,32 +2611,33 @@ async def get_all_users(current_admin: User = Depends(get_current_admin)):
         }
         user_list.append(user_stats)
     
-    return user_list
+    return ORJSONResponse(user_list, headers=next_cursor_headers(next_cursor))
 
 @api_router.get("/admin/dashboard-stats")
-async def get_admin_dashboard_stats(current_admin: User = Depends(get_current_admin)):
+async def get_admin_dashboard_stats(current_admin: Principal = Depends(get_current_admin)):
     """Get admin dashboard statistics"""
-    now = datetime.now(timezone.utc)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Today and this month follow the organization's calendar, matched on the indexed work_date key
+    today = local_work_date(datetime.now(timezone.utc), await get_organization_timezone())
+    month_start = today.replace(day=1)
     
     # Total users
-    total_users = await db.users.count_documents({"role": "employee"})
+    total_users = await db.users.count_documents({"role": "employee", "is_deleted": {"$ne": True}})
+    active_employees = await db.users.count_documents(
+        {"role": "employee", "status": "Active", "is_deleted": {"$ne": True}}
+    )
     
     # Active users today (users who started a session today)
-    active_today = await db.sessions.count_documents({
-        "start_time": {"$gte": today_start}
-    })
+    active_today = await db.sessions.count_documents({"work_date": today})
     
     # Total sessions this month
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     sessions_this_month = await db.sessions.count_documents({
-        "start_time": {"$gte": month_start},
+        "work_date": {"$gte": month_start},
         "end_time": {"$ne": None}
     })
     
     # Total leaves this month
     leaves_this_month = await db.leaves.count_documents({
-        "date": {"$gte": month_start.date().isoformat()}
+        "date": {"$gte": month_start}
     })
     
     # Recent sessions
@@ -1653,12 +2649,14 @@ async def get_admin_dashboard_stats(current_admin: User = Depends(get_current_ad
     
     recent_list = []
     for session in recent_sessions:
-        user = await db.users.find_one({"id": session["user_id"]})
+        user = await db.users.find_one(
+            {"id": session["user_id"], "is_deleted": {"$ne": True}}, USER_SUMMARY_PROJECTION
+        )
         if user:
             recent_list.append({
                 "user_name": user["name"],
                 "user_email": user["email"],
-                "date": session["start_time"].date().isoformat(),
+                "date": session_date_key(session),
                 "login_time": session["start_time"].strftime("%H:%M:%S"),
                 "logout_time": session["end_time"].strftime("%H:%M:%S") if session.get("end_time") else None,
                 "effective_hours": round(session.get("effective_seconds", 0) / 3600, 2),
@@ -1667,6 +2665,7 @@ async def get_admin_dashboard_stats(current_admin: User = Depends(get_current_ad
     
     return {
         "total_users": total_users,
+        "active_employees": active_employees,
         "active_today": active_today,
         "sessions_this_month": sessions_this_month,
         "leaves_this_month": leaves_this_month,
@@ -1674,23 +2673,36 @@ async def get_admin_dashboard_stats(current_admin: User = Depends(get_current_ad
     }
 
 @api_router.get("/admin/user/{user_id}/sessions")
-async def get_user_sessions(user_id: str, current_admin: User = Depends(get_current_admin)):
+async def get_user_sessions(user_id: str, current_admin: Principal = Depends(get_current_admin)):
     """Get all sessions for a specific user"""
     sessions = await db.sessions.find(
         {"user_id": user_id, "end_time": {"$ne": None}},
         sort=[("start_time", -1)]
     ).to_list(length=None)
-    
+    session_ids = [session_doc["id"] for session_doc in sessions]
+    
+    break_counts = {
+        item["_id"]: item["count"]
+        for item in await db.breaks.aggregate([
+            {"$match": {"session_id": {"$in": session_ids}}},
+            {"$group": {"_id": "$session_id", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+    }
+    timesheets = {
+        timesheet["session_id"]: timesheet
+        for timesheet in await db.timesheets.find(
+            {"session_id": {"$in": session_ids}}, {"_id": 0, "session_id": 1, "task_id": 1, "work_description": 1}
+        ).to_list(length=None)
+    }
+    
     session_list = []
     for session_doc in sessions:
-        breaks = await db.breaks.find({"session_id": session_doc["id"]}).to_list(length=None)
-        break_count = len(breaks)
-        
-        timesheet = await db.timesheets.find_one({"session_id": session_doc["id"]})
+        break_count = break_counts.get(session_doc["id"], 0)
+        timesheet = timesheets.get(session_doc["id"])
         
         session_list.append({
             "id": session_doc["id"],
-            "date": session_doc["start_time"].date().isoformat(),
+            "date": session_date_key(session_doc),
             "login_time": session_doc["start_time"].strftime("%H:%M:%S"),
             "logout_time": session_doc["end_time"].strftime("%H:%M:%S") if session_doc.get("end_time") else None,
             "effective_hours": round(session_doc.get("effective_seconds", 0) / 3600, 2),
@@ -1700,19 +2712,19 @@ async def get_user_sessions(user_id: str, current_admin: User = Depends(get_curr
             "work_description": timesheet.get("work_description") if timesheet else None
         })
     
-    return session_list
+    return ORJSONResponse(session_list)
 
 # Half day route
 @api_router.post("/leaves/half-day")
 async def apply_half_day(
     timesheet_data: TimesheetCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Find active session
     session_doc = await db.sessions.find_one({
         "user_id": current_user.id,
         "end_time": None
-    })
+    }, SESSION_PROJECTION)
     
     if not session_doc:
         raise HTTPException(status_code=404, detail="No active session found")
@@ -1721,7 +2733,7 @@ async def apply_half_day(
     
     # Mark session as half day and end it
     now = datetime.now(timezone.utc)
-    breaks = await db.breaks.find({"session_id": session.id}).to_list(length=None)
+    breaks = await db.breaks.find({"session_id": session.id}, BREAK_PROJECTION).to_list(length=None)
     effective_seconds = calculate_effective_seconds(session.start_time, breaks)
     total_break_seconds = 0
     for b in breaks:
@@ -1763,7 +2775,7 @@ async def apply_half_day(
     leave_record = {
         "id": str(uuid.uuid4()),
         "user_id": current_user.id,
-        "date": session.start_time.date().isoformat(),
+        "date": session.work_date or to_utc_date(session.start_time),
         "type": "half",
         "reason": "Half day application",
         "status": "approved"
@@ -1775,7 +2787,7 @@ async def apply_half_day(
 
 # Employee Project APIs
 @api_router.get("/employee/projects")
-async def get_employee_projects(current_user: User = Depends(get_current_user)):
+async def get_employee_projects(current_user: Principal = Depends(get_current_user)):
     """Get projects assigned to the current employee"""
     try:
         # Find project assignments for this employee
@@ -1783,10 +2795,10 @@ async def get_employee_projects(current_user: User = Depends(get_current_user)):
         
         projects = []
         for assignment in assignments:
-            project = await db.projects.find_one({"id": assignment["project_id"]})
+            project = await db.projects.find_one({"id": assignment["project_id"]}, PROJECT_SUMMARY_PROJECTION)
             if project:
                 # Get manager details
-                manager = await db.users.find_one({"id": project.get("manager_id")})
+                manager = await db.users.find_one({"id": project.get("manager_id")}, USER_SUMMARY_PROJECTION)
                 manager_name = manager["name"] if manager else "Not assigned"
                 
                 projects.append({
@@ -1805,123 +2817,287 @@ async def get_employee_projects(current_user: User = Depends(get_current_user)):
         print(f"Error fetching employee projects: {e}")
         return []
 
+# Manager resolution for leave routing
+MANAGER_MAP_TTL_SECONDS = int(os.environ.get("MANAGER_MAP_TTL_SECONDS", "300"))
+manager_resolution_cache = {"map": {}, "refreshed_at": None}
+manager_resolution_lock = asyncio.Lock()
+
+def build_manager_resolution(managers: list, assignments: list, projects: list, employee_ids: set = None) -> dict:
+    """Map employees to their approving manager: the department manager, else the first project manager"""
+    department_managers = {}
+    manager_users = {}
+    for manager in managers:
+        department_managers.setdefault(manager["department_id"], manager["employee_id"])
+        manager_users[manager["id"]] = manager["employee_id"]
+    
+    # Project managers are the fallback for employees whose department has no manager
+    resolution = {}
+    for project in projects:
+        project_manager = manager_users.get(project.get("manager_id"), project.get("manager_id"))
+        if not project_manager:
+            continue
+        for emp_id in project.get("employee_ids", []):
+            if employee_ids is None or emp_id in employee_ids:
+                resolution.setdefault(emp_id, project_manager)
+    
+    for assignment in assignments:
+        department_manager = department_managers.get(assignment["department_id"])
+        if department_manager:
+            resolution[assignment["employee_id"]] = department_manager
+    return resolution
+
+async def refresh_manager_resolution_map() -> dict:
+    """Rebuild the employee -> approving manager map from department and project assignments"""
+    async with manager_resolution_lock:
+        managers = await db.managers.find(
+            {}, {"_id": 0, "id": 1, "employee_id": 1, "department_id": 1}
+        ).to_list(length=None)
+        assignments = await db.employee_departments.find(
+            {}, {"_id": 0, "employee_id": 1, "department_id": 1}
+        ).to_list(length=None)
+        projects = await db.projects.find(
+            {}, {"_id": 0, "manager_id": 1, "employee_ids": 1}
+        ).to_list(length=None)
+        
+        resolution = build_manager_resolution(managers, assignments, projects)
+        manager_resolution_cache["map"] = resolution
+        manager_resolution_cache["refreshed_at"] = datetime.now(timezone.utc)
+        return resolution
+
+async def lookup_manager_ids(employee_ids: list) -> dict:
+    """Resolve a few employees' managers directly from the database, in three indexed queries"""
+    assignments = await db.employee_departments.find(
+        {"employee_id": {"$in": employee_ids}}, {"_id": 0, "employee_id": 1, "department_id": 1}
+    ).to_list(length=None)
+    projects = await db.projects.find(
+        {"employee_ids": {"$in": employee_ids}}, {"_id": 0, "manager_id": 1, "employee_ids": 1}
+    ).to_list(length=None)
+    managers = await db.managers.find(
+        {"$or": [
+            {"department_id": {"$in": [assignment["department_id"] for assignment in assignments]}},
+            {"id": {"$in": [project["manager_id"] for project in projects if project.get("manager_id")]}}
+        ]},
+        {"_id": 0, "id": 1, "employee_id": 1, "department_id": 1}
+    ).to_list(length=None)
+    return build_manager_resolution(managers, assignments, projects, set(employee_ids))
+
+async def refresh_manager_resolution_entries(employee_ids: list):
+    """Re-resolve only the given employees in the cached map after a change that affects just them"""
+    employee_ids = list(dict.fromkeys(employee_ids))
+    if not employee_ids:
+        return
+    # Hold the rebuild lock so a concurrent full rebuild cannot overwrite (or be overwritten by) this update
+    async with manager_resolution_lock:
+        resolved = await lookup_manager_ids(employee_ids)
+        resolution = manager_resolution_cache["map"]
+        for employee_id in employee_ids:
+            if resolved.get(employee_id):
+                resolution[employee_id] = resolved[employee_id]
+            else:
+                resolution.pop(employee_id, None)
+
+async def resolve_manager_id(employee_id: str) -> Optional[str]:
+    """Resolve an employee's manager from the cached map, rebuilding it once it is older than the TTL"""
+    refreshed_at = manager_resolution_cache["refreshed_at"]
+    if refreshed_at is None or (datetime.now(timezone.utc) - refreshed_at).total_seconds() > MANAGER_MAP_TTL_SECONDS:
+        await refresh_manager_resolution_map()
+    
+    resolution = manager_resolution_cache["map"]
+    if employee_id in resolution:
+        return resolution[employee_id]
+    # Employees assigned since the last rebuild (e.g. new registrations, or on another worker) fall back
+    # to a direct lookup; a missing manager is not cached so a later assignment is seen immediately
+    manager_id = (await lookup_manager_ids([employee_id])).get(employee_id)
+    if manager_id:
+        resolution[employee_id] = manager_id
+    return manager_id
+
+@api_router.get("/admin/manager-resolution-map")
+async def get_manager_resolution_map(refresh: bool = False, current_admin: Principal = Depends(get_current_admin)):
+    """Get the cached employee -> manager map used for leave routing"""
+    if refresh or manager_resolution_cache["refreshed_at"] is None:
+        await refresh_manager_resolution_map()
+    
+    resolution = manager_resolution_cache["map"]
+    return {
+        "refreshed_at": manager_resolution_cache["refreshed_at"].isoformat(),
+        "ttl_seconds": MANAGER_MAP_TTL_SECONDS,
+        "total_employees": len(resolution),
+        "unresolved_employees": len([m for m in resolution.values() if not m]),
+        "map": resolution
+    }
+
 # Leave Management APIs
+LEAVE_TYPE_KEYS = {
+    "Casual Leave": "casual_leave",
+    "Sick Leave": "sick_leave",
+    "Leave without Pay": "leave_without_pay"
+}
+
+async def get_leave_allocations(now: datetime):
+    """Get allocated days per leave type for the quarters completed so far, plus the current quarter"""
+    settings = await db.leave_settings.find_one({}) or {}
+    quarter = (now.month - 1) // 3 + 1
+    allocations = {
+        "Casual Leave": quarter * settings.get("casual_leave_quarterly", 2),
+        "Sick Leave": quarter * settings.get("sick_leave_quarterly", 2),
+        "Leave without Pay": quarter * settings.get("leave_without_pay_quarterly", 5)
+    }
+    return allocations, quarter
+
+async def ensure_leave_ledger(user_id: str, year: int, leave_type: str) -> dict:
+    """Get the leave ledger entry for a user, year and leave type, seeding it from approved leaves on first use"""
+    ledger_key = {"user_id": user_id, "year": year, "leave_type": leave_type}
+    ledger = await db.leave_ledger.find_one(ledger_key)
+    if ledger:
+        return ledger
+    
+    # One-time backfill from leaves approved before the ledger existed
+    seeded = await db.leaves.aggregate([
+        {"$match": {
+            "user_id": user_id,
+            "leave_type": leave_type,
+            "status": "approved",
+            "created_at": {
+                "$gte": datetime(year, 1, 1, tzinfo=timezone.utc),
+                "$lt": datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+            }
+        }},
+        {"$group": {"_id": None, "used": {"$sum": {"$ifNull": ["$days_count", 1]}}}}
+    ]).to_list(length=1)
+    
+    await db.leave_ledger.update_one(
+        ledger_key,
+        {"$setOnInsert": {
+            "id": str(uuid.uuid4()),
+            "used": seeded[0]["used"] if seeded else 0,
+            "pending": 0,
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+    return await db.leave_ledger.find_one(ledger_key)
+
+async def reserve_leave_days(user_id: str, year: int, leave_type: str, days: float, allocated: float) -> bool:
+    """Atomically reserve pending leave days, only if the ledger stays within the allocation"""
+    await ensure_leave_ledger(user_id, year, leave_type)
+    result = await db.leave_ledger.update_one(
+        {
+            "user_id": user_id,
+            "year": year,
+            "leave_type": leave_type,
+            "$expr": {"$lte": [{"$add": ["$used", "$pending", days]}, allocated]}
+        },
+        {"$inc": {"pending": days}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+    return result.modified_count == 1
+
+async def adjust_leave_ledger(user_id: str, year: int, leave_type: str, used: float = 0, pending: float = 0):
+    """Apply a used/pending delta to a leave ledger entry"""
+    await ensure_leave_ledger(user_id, year, leave_type)
+    await db.leave_ledger.update_one(
+        {"user_id": user_id, "year": year, "leave_type": leave_type},
+        {"$inc": {"used": used, "pending": pending}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+
 @api_router.get("/employee/leave-balance")
-async def get_employee_leave_balance(current_user: User = Depends(get_current_user)):
+async def get_employee_leave_balance(current_user: Principal = Depends(get_current_user)):
     """Get current leave balance for employee"""
     try:
-        # Get leave settings
-        settings = await db.leave_settings.find_one({}) or {}
-        quarterly_casual = settings.get("casual_leave_quarterly", 2)
-        quarterly_sick = settings.get("sick_leave_quarterly", 2) 
-        quarterly_lwp = settings.get("leave_without_pay_quarterly", 5)
-        
-        # Calculate quarterly allocation (current quarter)
         now = datetime.now(timezone.utc)
-        quarter = (now.month - 1) // 3 + 1
-        
-        # Get used leaves for current year
-        year_start = datetime(now.year, 1, 1, tzinfo=timezone.utc)
-        used_leaves = await db.leaves.find({
-            "user_id": current_user.id,
-            "status": "approved",
-            "created_at": {"$gte": year_start}
-        }).to_list(length=None)
+        allocations, quarter = await get_leave_allocations(now)
         
-        used_casual = sum(1 for leave in used_leaves if leave.get("leave_type") == "Casual Leave")
-        used_sick = sum(1 for leave in used_leaves if leave.get("leave_type") == "Sick Leave") 
-        used_lwp = sum(1 for leave in used_leaves if leave.get("leave_type") == "Leave without Pay")
+        # Single indexed fetch of this year's ledger entries
+        ledgers = await db.leave_ledger.find(
+            {"user_id": current_user.id, "year": now.year}
+        ).to_list(length=None)
+        ledger_by_type = {ledger["leave_type"]: ledger for ledger in ledgers}
         
-        # Calculate available balance (quarters completed * quarterly allocation - used)
-        available_casual = max(0, (quarter * quarterly_casual) - used_casual)
-        available_sick = max(0, (quarter * quarterly_sick) - used_sick)
-        available_lwp = max(0, (quarter * quarterly_lwp) - used_lwp)
+        balance = {"quarter": quarter}
+        for leave_type, key in LEAVE_TYPE_KEYS.items():
+            ledger = ledger_by_type.get(leave_type)
+            if not ledger:
+                ledger = await ensure_leave_ledger(current_user.id, now.year, leave_type)
+            
+            allocated = allocations[leave_type]
+            balance[key] = {
+                "allocated": allocated,
+                "used": ledger["used"],
+                "pending": ledger["pending"],
+                "available": max(0, allocated - ledger["used"] - ledger["pending"])
+            }
         
-        return {
-            "casual_leave": {
-                "allocated": quarter * quarterly_casual,
-                "used": used_casual,
-                "available": available_casual
-            },
-            "sick_leave": {
-                "allocated": quarter * quarterly_sick,
-                "used": used_sick,
-                "available": available_sick
-            },
-            "leave_without_pay": {
-                "allocated": quarter * quarterly_lwp,
-                "used": used_lwp,
-                "available": available_lwp
-            },
-            "quarter": quarter
-        }
+        return balance
     except Exception as e:
         print(f"Error fetching leave balance: {e}")
         return {"error": "Failed to fetch leave balance"}
 
 @api_router.post("/employee/apply-leave")
-async def apply_leave(leave_data: LeaveApplicationCreate, current_user: User = Depends(get_current_user)):
+async def apply_leave(leave_data: LeaveApplicationCreate, current_user: Principal = Depends(get_current_user)):
     """Apply for leave"""
     try:
-        # Check if user has sufficient leave balance
-        balance = await get_employee_leave_balance(current_user)
-        
-        leave_type_key = {
-            "Casual Leave": "casual_leave",
-            "Sick Leave": "sick_leave", 
-            "Leave without Pay": "leave_without_pay"
-        }.get(leave_data.leave_type)
-        
-        if leave_type_key and balance[leave_type_key]["available"] < leave_data.days_count:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Insufficient {leave_data.leave_type} balance. Available: {balance[leave_type_key]['available']}"
-            )
-        
-        # Find employee's manager through department assignment
-        manager_id = None
+        start_date = date_or_400(leave_data.start_date, "start_date")
+        end_date = date_or_400(leave_data.end_date, "end_date")
+        if not start_date or not end_date or end_date < start_date:
+            raise HTTPException(status_code=400, detail="start_date and end_date are required and end_date cannot precede start_date")
         
-        # Find employee's department assignment
-        employee_dept_assignment = await db.employee_departments.find_one({"employee_id": current_user.id})
+        # Charge the working days the leave is recorded for on approval, not the client's count
+        working_days = leave_working_days(start_date, end_date, await mandatory_holiday_dates(start_date, end_date))
+        if not working_days:
+            raise HTTPException(status_code=400, detail="The selected dates contain no working days")
+        days_count = 0.5 if start_date == end_date and leave_data.days_count == 0.5 else len(working_days)
         
-        if employee_dept_assignment:
-            department_id = employee_dept_assignment["department_id"]
-            
-            # Find manager assigned to this department
-            manager_assignment = await db.managers.find_one({"department_id": department_id})
-            
-            if manager_assignment:
-                manager_id = manager_assignment["employee_id"]
-        
-        # If no department assignment found, try to find through project assignments
-        if not manager_id:
-            projects = await db.projects.find({"employee_ids": current_user.id}).to_list(length=None)
-            if projects:
-                # Get manager from first project
-                project = projects[0]
-                manager_id = project.get("manager_id")
+        # Resolve the approving manager from the cached employee -> manager map
+        manager_id = await resolve_manager_id(current_user.id)
         
         # If still no manager found, log a warning but allow the application to proceed
         if not manager_id:
             print(f"Warning: No manager found for employee {current_user.id}. Leave request will be created without manager assignment.")
         
+        # Reserve the days against the leave ledger; the conditional update rejects over-booking atomically
+        now = datetime.now(timezone.utc)
+        ledger_year = None
+        if leave_data.leave_type in LEAVE_TYPE_KEYS:
+            allocations, _ = await get_leave_allocations(now)
+            allocated = allocations[leave_data.leave_type]
+            reserved = await reserve_leave_days(
+                current_user.id, now.year, leave_data.leave_type, days_count, allocated
+            )
+            if not reserved:
+                ledger = await ensure_leave_ledger(current_user.id, now.year, leave_data.leave_type)
+                available = max(0, allocated - ledger["used"] - ledger["pending"])
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Insufficient {leave_data.leave_type} balance. Available: {available}"
+                )
+            ledger_year = now.year
+        
         # Create leave application
         leave_application = {
             "id": str(uuid.uuid4()),
             "user_id": current_user.id,
+            "employee_name": current_user.name,
             "leave_type": leave_data.leave_type,
-            "start_date": leave_data.start_date,
-            "end_date": leave_data.end_date,
+            "start_date": start_date,
+            "end_date": end_date,
             "reason": leave_data.reason,
-            "days_count": leave_data.days_count,
+            "days_count": days_count,
             "status": "pending",
             "manager_id": manager_id,
-            "created_at": datetime.now(timezone.utc),
+            "ledger_year": ledger_year,
+            "created_at": now,
             "manager_reason": ""
         }
         
-        await db.leave_applications.insert_one(leave_application)
-        return {"message": "Leave application submitted successfully", "id": leave_application["id"]}
+        try:
+            await db.leave_applications.insert_one(leave_application)
+        except Exception:
+            if ledger_year:
+                await adjust_leave_ledger(
+                    current_user.id, ledger_year, leave_data.leave_type, pending=-days_count
+                )
+            raise
+        return {"message": "Leave application submitted successfully", "id": leave_application["id"], "days_count": days_count}
         
     except HTTPException:
         raise
@@ -1930,7 +3106,7 @@ async def apply_leave(leave_data: LeaveApplicationCreate, current_user: User = D
         raise HTTPException(status_code=500, detail="Failed to apply for leave")
 
 @api_router.get("/employee/leave-requests")
-async def get_employee_leave_requests(current_user: User = Depends(get_current_user)):
+async def get_employee_leave_requests(current_user: Principal = Depends(get_current_user)):
     """Get leave requests for current employee"""
     try:
         requests = await db.leave_applications.find(
@@ -1943,8 +3119,8 @@ async def get_employee_leave_requests(current_user: User = Depends(get_current_u
             formatted_requests.append({
                 "id": req["id"],
                 "leave_type": req["leave_type"],
-                "start_date": req["start_date"],
-                "end_date": req["end_date"],
+                "start_date": date_key(req["start_date"]),
+                "end_date": date_key(req["end_date"]),
                 "reason": req["reason"],
                 "days_count": req["days_count"],
                 "status": req["status"],
@@ -1957,11 +3133,74 @@ async def get_employee_leave_requests(current_user: User = Depends(get_current_u
         print(f"Error fetching leave requests: {e}")
         return []
 
+@api_router.put("/employee/leave-requests/{request_id}/cancel")
+async def cancel_leave_request(request_id: str, current_user: Principal = Depends(get_current_user)):
+    """Cancel a pending or approved leave request and return its days to the balance"""
+    try:
+        leave_request = await db.leave_applications.find_one({"id": request_id, "user_id": current_user.id})
+        if not leave_request:
+            raise HTTPException(status_code=404, detail="Leave request not found")
+        
+        previous_status = leave_request["status"]
+        if previous_status not in ("pending", "approved"):
+            raise HTTPException(status_code=400, detail=f"Cannot cancel a {previous_status} leave request")
+        
+        result = await db.leave_applications.update_one(
+            {"id": request_id, "status": previous_status},
+            {"$set": {"status": "cancelled", "cancelled_at": datetime.now(timezone.utc)}}
+        )
+        if result.modified_count == 0:
+            raise HTTPException(status_code=400, detail="Leave request has already been processed")
+        
+        # Reverse the ledger entry made when the request was applied for or approved
+        ledger_year = leave_request.get("ledger_year")
+        if ledger_year and leave_request["leave_type"] in LEAVE_TYPE_KEYS:
+            days = leave_request["days_count"]
+            if previous_status == "pending":
+                await adjust_leave_ledger(current_user.id, ledger_year, leave_request["leave_type"], pending=-days)
+            else:
+                await adjust_leave_ledger(current_user.id, ledger_year, leave_request["leave_type"], used=-days)
+        
+        if previous_status == "approved":
+            await db.leaves.delete_many({"application_id": request_id})
+        
+        return {"message": "Leave request cancelled successfully"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error cancelling leave request: {e}")
+        raise HTTPException(status_code=500, detail="Failed to cancel leave request")
+
 # Employee-Department Assignment APIs
+def department_assignment_upsert(employee_id: str, department_id: str) -> UpdateOne:
+    """Build the upsert that (re)assigns an employee to a department"""
+    return UpdateOne(
+        {"employee_id": employee_id},
+        {
+            "$set": {"department_id": department_id, "assigned_at": datetime.now(timezone.utc)},
+            "$setOnInsert": {"id": str(uuid.uuid4())}
+        },
+        upsert=True
+    )
+
+async def dedupe_employee_departments():
+    """Keep only the latest department assignment per employee so employee_id can be unique"""
+    duplicates = await db.employee_departments.aggregate([
+        {"$sort": {"assigned_at": -1}},
+        {"$group": {"_id": "$employee_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]).to_list(length=None)
+    
+    stale_ids = [doc_id for duplicate in duplicates for doc_id in duplicate["ids"][1:]]
+    if stale_ids:
+        await db.employee_departments.delete_many({"_id": {"$in": stale_ids}})
+    return len(stale_ids)
+
 @api_router.post("/admin/assign-employee-department")
 async def assign_employee_department(
     assignment_data: dict,
-    current_admin: User = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Assign employee to department"""
     try:
@@ -1972,7 +3211,9 @@ async def assign_employee_department(
             raise HTTPException(status_code=400, detail="Employee ID and Department ID are required")
         
         # Verify employee exists
-        employee = await db.users.find_one({"id": employee_id, "role": "employee"})
+        employee = await db.users.find_one(
+            {"id": employee_id, "role": "employee", "is_deleted": {"$ne": True}}, EXISTS_PROJECTION
+        )
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
         
@@ -1982,18 +3223,10 @@ async def assign_employee_department(
             raise HTTPException(status_code=404, detail="Department not found")
         
         # Create or update employee department assignment
-        assignment = {
-            "id": str(uuid.uuid4()),
-            "employee_id": employee_id,
-            "department_id": department_id,
-            "assigned_at": datetime.now(timezone.utc)
-        }
-        
-        # Remove existing assignment if any
-        await db.employee_departments.delete_many({"employee_id": employee_id})
-        
-        # Add new assignment
-        await db.employee_departments.insert_one(assignment)
+        await db.employee_departments.bulk_write(
+            [department_assignment_upsert(employee_id, department_id)]
+        )
+        await refresh_manager_resolution_entries([employee_id])
         
         return {"message": "Employee assigned to department successfully"}
         
@@ -2006,7 +3239,7 @@ async def assign_employee_department(
 @api_router.post("/admin/bulk-assign-employees")
 async def bulk_assign_employees_to_department(
     bulk_data: dict,
-    current_admin: User = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Bulk assign multiple employees to a department"""
     try:
@@ -2021,25 +3254,28 @@ async def bulk_assign_employees_to_department(
         if not department:
             raise HTTPException(status_code=404, detail="Department not found")
         
-        success_count = 0
-        for employee_id in employee_ids:
-            # Verify employee exists
-            employee = await db.users.find_one({"id": employee_id, "role": "employee"})
-            if employee:
-                # Remove existing assignment
-                await db.employee_departments.delete_many({"employee_id": employee_id})
-                
-                # Add new assignment
-                assignment = {
-                    "id": str(uuid.uuid4()),
-                    "employee_id": employee_id,
-                    "department_id": department_id,
-                    "assigned_at": datetime.now(timezone.utc)
-                }
-                await db.employee_departments.insert_one(assignment)
-                success_count += 1
+        # Validate every employee id with one $in query
+        requested_ids = list(dict.fromkeys(employee_ids))
+        employees = await db.users.find(
+            {"id": {"$in": requested_ids}, "role": "employee", "is_deleted": {"$ne": True}}, {"_id": 0, "id": 1}
+        ).to_list(length=None)
+        found_ids = {emp["id"] for emp in employees}
+        matched_ids = [emp_id for emp_id in requested_ids if emp_id in found_ids]
+        missing_ids = [emp_id for emp_id in requested_ids if emp_id not in found_ids]
+        
+        # Reassign everyone in a single round trip, upserting on the unique employee_id
+        if matched_ids:
+            await db.employee_departments.bulk_write(
+                [department_assignment_upsert(emp_id, department_id) for emp_id in matched_ids],
+                ordered=False
+            )
+            await refresh_manager_resolution_map()
         
-        return {"message": f"Successfully assigned {success_count} employees to department"}
+        return {
+            "message": f"Successfully assigned {len(matched_ids)} employees to department",
+            "matched_ids": matched_ids,
+            "missing_ids": missing_ids
+        }
         
     except HTTPException:
         raise
@@ -2048,29 +3284,45 @@ async def bulk_assign_employees_to_department(
         raise HTTPException(status_code=500, detail="Failed to assign employees")
 
 @api_router.get("/admin/employee-department-assignments")
-async def get_employee_department_assignments(current_admin: User = Depends(get_current_admin)):
+async def get_employee_department_assignments(
+    department_id: str = None,
+    skip: int = 0,
+    limit: int = None,
+    current_admin: Principal = Depends(get_current_admin)
+):
     """Get all employee-department assignments"""
     try:
-        assignments = await db.employee_departments.find({}).to_list(length=None)
+        pipeline = []
+        if department_id:
+            pipeline.append({"$match": {"department_id": department_id}})
+        pipeline.append({"$sort": {"assigned_at": 1, "_id": 1}})
+        if skip:
+            pipeline.append({"$skip": max(0, skip)})
+        if limit:
+            pipeline.append({"$limit": max(1, limit)})
         
-        assignment_list = []
-        for assignment in assignments:
-            # Get employee details
-            employee = await db.users.find_one({"id": assignment["employee_id"]})
-            
-            # Get department details
-            department = await db.departments.find_one({"id": assignment["department_id"]})
-            
-            if employee and department:
-                assignment_list.append({
-                    "id": assignment["id"],
-                    "employee_id": assignment["employee_id"],
-                    "employee_name": employee["name"],
-                    "employee_email": employee["email"],
-                    "department_id": assignment["department_id"],
-                    "department_name": department["name"],
-                    "assigned_at": assignment["assigned_at"].isoformat()
-                })
+        # Join employee and department details server-side instead of two find_one calls per row
+        pipeline.extend([
+            {"$lookup": {"from": "users", "localField": "employee_id", "foreignField": "id", "as": "employee"}},
+            {"$unwind": "$employee"},
+            {"$match": {"employee.is_deleted": {"$ne": True}}},
+            {"$lookup": {"from": "departments", "localField": "department_id", "foreignField": "id", "as": "department"}},
+            {"$unwind": "$department"},
+            {"$project": {
+                "_id": 0,
+                "id": 1,
+                "employee_id": 1,
+                "employee_name": "$employee.name",
+                "employee_email": "$employee.email",
+                "department_id": 1,
+                "department_name": "$department.name",
+                "assigned_at": 1
+            }}
+        ])
+        
+        assignment_list = await db.employee_departments.aggregate(pipeline).to_list(length=None)
+        for assignment in assignment_list:
+            assignment["assigned_at"] = assignment["assigned_at"].isoformat()
         
         return assignment_list
         
@@ -2080,7 +3332,7 @@ async def get_employee_department_assignments(current_admin: User = Depends(get_
 
 # Manager Status Check API
 @api_router.get("/employee/manager-status")
-async def check_manager_status(current_user: User = Depends(get_current_user)):
+async def check_manager_status(current_user: Principal = Depends(get_current_user)):
     """Check if current user is a manager"""
     try:
         # Check if user is assigned as a manager in any department
@@ -2103,44 +3355,253 @@ async def check_manager_status(current_user: User = Depends(get_current_user)):
         return {"is_manager": False}
 
 # Manager Leave Approval APIs  
+def leave_ledger_delta(leave_request: dict, status: str):
+    """Get the (used, pending) ledger delta for settling a pending application, or None if it has no ledger effect"""
+    if leave_request["leave_type"] not in LEAVE_TYPE_KEYS:
+        return None
+    days = leave_request["days_count"]
+    # Applications made before the ledger existed never reserved their days
+    reserved = days if leave_request.get("ledger_year") else 0
+    if status == "approved":
+        return days, -reserved
+    if reserved:
+        return 0, -reserved
+    return None
+
+def mandatory_holiday_keys(holidays: list) -> set:
+    """Date keys of the mandatory holidays in a list; holidays without a type predate Optional ones and count"""
+    return {date_key(holiday["date"]) for holiday in holidays if holiday.get("type", "Mandatory") == "Mandatory"}
+
+async def mandatory_holiday_dates(start: datetime, end: datetime) -> set:
+    """Dates of mandatory holidays in [start, end] from a single indexed range query"""
+    holidays = await db.holidays.find(
+        {"date": {"$gte": start, "$lte": end}}, {"_id": 0, "date": 1, "type": 1}
+    ).to_list(length=None)
+    return mandatory_holiday_keys(holidays)
+
+def leave_working_days(start: datetime, end: datetime, holiday_dates: set) -> list:
+    """Weekdays in [start, end] that are not mandatory holidays, the days a leave is recorded and charged for"""
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5 and date_key(day) not in holiday_dates:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+async def build_leave_records(leave_requests: list) -> list:
+    """Expand approved applications into one leave record per working day, skipping weekends and mandatory holidays"""
+    spans = []
+    for leave_request in leave_requests:
+        start, end = to_utc_date(leave_request["start_date"]), to_utc_date(leave_request["end_date"])
+        if start and end:
+            spans.append((leave_request, start, max(start, end)))
+    if not spans:
+        return []
+    
+    holiday_dates = await mandatory_holiday_dates(min(span[1] for span in spans), max(span[2] for span in spans))
+    now = datetime.now(timezone.utc)
+    records = []
+    for leave_request, start, end in spans:
+        is_half_day = start == end and leave_request.get("days_count") == 0.5
+        for day in leave_working_days(start, end, holiday_dates):
+            records.append({
+                "id": str(uuid.uuid4()),
+                "application_id": leave_request["id"],
+                "user_id": leave_request["user_id"],
+                "leave_type": leave_request["leave_type"],
+                "date": day,
+                "type": "half" if is_half_day else "full",
+                "days_count": 0.5 if is_half_day else 1,
+                "reason": leave_request["reason"],
+                "status": "approved",
+                "created_at": now
+            })
+    return records
+
+def build_leave_notification(leave_request: dict, status: str, manager_reason: str) -> dict:
+    """Build the notification sent to an employee when their leave request is decided"""
+    notification_message = (
+        f"Your {leave_request['leave_type']} request from {date_key(leave_request['start_date'])} "
+        f"to {date_key(leave_request['end_date'])} has been {status}."
+    )
+    if status == "rejected" and manager_reason:
+        notification_message += f" Reason: {manager_reason}"
+    
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": leave_request["user_id"],
+        "title": f"Leave Request {status.title()}",
+        "message": notification_message,
+        "type": "leave_update",
+        "status": "unread",
+        "created_at": datetime.now(timezone.utc),
+        "related_request_id": leave_request["id"]
+    }
+
 @api_router.get("/manager/leave-requests")
-async def get_pending_leave_requests(current_user: User = Depends(get_current_user)):
+async def get_pending_leave_requests(
+    leave_type: str = None,
+    from_date: str = None,
+    to_date: str = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: Principal = Depends(get_current_user)
+):
     """Get pending leave requests for manager approval"""
     try:
         # Find pending leave requests where current user is the manager
-        requests = await db.leave_applications.find({
-            "manager_id": current_user.id,
-            "status": "pending"
-        }, sort=[("created_at", -1)]).to_list(length=None)
+        query = {"manager_id": current_user.id, "status": "pending"}
+        if leave_type:
+            query["leave_type"] = leave_type
+        # Keep requests overlapping the [from_date, to_date] window
+        if from_date:
+            query["end_date"] = {"$gte": date_or_400(from_date, "from_date")}
+        if to_date:
+            query["start_date"] = {"$lte": date_or_400(to_date, "to_date")}
+        
+        requests = await db.leave_applications.find(
+            query,
+            sort=[("created_at", -1)],
+            skip=max(0, skip),
+            limit=max(1, min(limit, 500))
+        ).to_list(length=None)
+        
+        # Employee names are stored on the application; resolve older applications in one query
+        missing_ids = list({req["user_id"] for req in requests if not req.get("employee_name")})
+        employee_names = {}
+        if missing_ids:
+            employees = await db.users.find(
+                {"id": {"$in": missing_ids}}, {"_id": 0, "id": 1, "name": 1}
+            ).to_list(length=None)
+            employee_names = {emp["id"]: emp["name"] for emp in employees}
         
         formatted_requests = []
         for req in requests:
-            # Get employee details
-            employee = await db.users.find_one({"id": req["user_id"]})
-            employee_name = employee["name"] if employee else "Unknown Employee"
+            employee_name = req.get("employee_name") or employee_names.get(req["user_id"], "Unknown Employee")
             
             formatted_requests.append({
                 "id": req["id"],
                 "employee_name": employee_name,
                 "employee_id": req["user_id"],
                 "leave_type": req["leave_type"],
-                "start_date": req["start_date"],
-                "end_date": req["end_date"],
+                "start_date": date_key(req["start_date"]),
+                "end_date": date_key(req["end_date"]),
                 "reason": req["reason"],
                 "days_count": req["days_count"],
                 "created_at": req["created_at"].isoformat()
             })
             
         return formatted_requests
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching manager leave requests: {e}")
         return []
 
+@api_router.post("/manager/leave-requests/bulk-action")
+async def bulk_approve_reject_leave(
+    bulk_data: BulkLeaveApprovalRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Approve or reject many leave requests at once"""
+    try:
+        if bulk_data.status not in ("approved", "rejected"):
+            raise HTTPException(status_code=400, detail="Status must be approved or rejected")
+        if not bulk_data.request_ids:
+            raise HTTPException(status_code=400, detail="Request IDs are required")
+        
+        request_ids = list(dict.fromkeys(bulk_data.request_ids))
+        leave_requests = await db.leave_applications.find({
+            "id": {"$in": request_ids},
+            "manager_id": current_user.id,
+            "status": "pending"
+        }).to_list(length=None)
+        
+        if leave_requests:
+            now = datetime.now(timezone.utc)
+            batch_id = str(uuid.uuid4())
+            current_year = now.year
+            
+            # Each update is conditional on the request still being pending
+            await db.leave_applications.bulk_write([
+                UpdateOne(
+                    {"id": req["id"], "status": "pending"},
+                    {"$set": {
+                        "status": bulk_data.status,
+                        "manager_reason": bulk_data.manager_reason,
+                        "approved_at": now,
+                        "ledger_year": req.get("ledger_year") or current_year,
+                        "decision_batch_id": batch_id
+                    }}
+                )
+                for req in leave_requests
+            ], ordered=False)
+            
+            processed_ids = {
+                doc["id"] for doc in await db.leave_applications.find(
+                    {"id": {"$in": [req["id"] for req in leave_requests]}, "decision_batch_id": batch_id},
+                    {"_id": 0, "id": 1}
+                ).to_list(length=None)
+            }
+            leave_requests = [req for req in leave_requests if req["id"] in processed_ids]
+            
+            # Aggregate ledger deltas per user/year/type so each ledger entry is updated once
+            ledger_deltas = {}
+            for req in leave_requests:
+                delta = leave_ledger_delta(req, bulk_data.status)
+                if delta:
+                    key = (req["user_id"], req.get("ledger_year") or current_year, req["leave_type"])
+                    used, pending = ledger_deltas.get(key, (0, 0))
+                    ledger_deltas[key] = (used + delta[0], pending + delta[1])
+            
+            if ledger_deltas:
+                existing_ledgers = await db.leave_ledger.find(
+                    {"user_id": {"$in": list({key[0] for key in ledger_deltas})}},
+                    {"_id": 0, "user_id": 1, "year": 1, "leave_type": 1}
+                ).to_list(length=None)
+                existing_keys = {(l["user_id"], l["year"], l["leave_type"]) for l in existing_ledgers}
+                for key in ledger_deltas:
+                    if key not in existing_keys:
+                        await ensure_leave_ledger(*key)
+                
+                await db.leave_ledger.bulk_write([
+                    UpdateOne(
+                        {"user_id": user_id, "year": year, "leave_type": leave_type},
+                        {"$inc": {"used": used, "pending": pending}, "$set": {"updated_at": now}}
+                    )
+                    for (user_id, year, leave_type), (used, pending) in ledger_deltas.items()
+                ], ordered=False)
+            
+            if bulk_data.status == "approved" and leave_requests:
+                leave_records = await build_leave_records(leave_requests)
+                if leave_records:
+                    await db.leaves.insert_many(leave_records, ordered=False)
+            
+            if leave_requests:
+                await db.notifications.insert_many([
+                    build_leave_notification(req, bulk_data.status, bulk_data.manager_reason)
+                    for req in leave_requests
+                ], ordered=False)
+        
+        processed_ids = {req["id"] for req in leave_requests}
+        return {
+            "message": f"{len(processed_ids)} leave requests {bulk_data.status} successfully",
+            "processed_ids": [req_id for req_id in request_ids if req_id in processed_ids],
+            "skipped_ids": [req_id for req_id in request_ids if req_id not in processed_ids]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error processing bulk leave approval: {e}")
+        raise HTTPException(status_code=500, detail="Failed to process leave requests")
+
 @api_router.put("/manager/leave-requests/{request_id}")
 async def approve_reject_leave(
     request_id: str, 
     approval_data: LeaveApprovalRequest, 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Approve or reject leave request"""
     try:
@@ -2153,46 +3614,37 @@ async def approve_reject_leave(
         if leave_request.get("manager_id") != current_user.id:
             raise HTTPException(status_code=403, detail="You are not authorized to approve this request")
         
-        # Update leave request
+        # Update leave request, only while it is still pending so the ledger is settled exactly once
+        ledger_year = leave_request.get("ledger_year") or datetime.now(timezone.utc).year
         update_data = {
             "status": approval_data.status,
             "manager_reason": approval_data.manager_reason,
-            "approved_at": datetime.now(timezone.utc)
+            "approved_at": datetime.now(timezone.utc),
+            "ledger_year": ledger_year
         }
         
-        await db.leave_applications.update_one({"id": request_id}, {"$set": update_data})
+        result = await db.leave_applications.update_one(
+            {"id": request_id, "status": "pending"},
+            {"$set": update_data}
+        )
+        if result.modified_count == 0:
+            raise HTTPException(status_code=400, detail="Leave request has already been processed")
+        
+        # Move reserved days to used on approval, release them on rejection
+        delta = leave_ledger_delta(leave_request, approval_data.status)
+        if delta:
+            await adjust_leave_ledger(
+                leave_request["user_id"], ledger_year, leave_request["leave_type"], used=delta[0], pending=delta[1]
+            )
         
-        # If approved, create leave record
+        # If approved, create one leave record per working day
         if approval_data.status == "approved":
-            leave_record = {
-                "id": str(uuid.uuid4()),
-                "user_id": leave_request["user_id"],
-                "leave_type": leave_request["leave_type"],
-                "start_date": leave_request["start_date"],
-                "end_date": leave_request["end_date"],
-                "days_count": leave_request["days_count"],
-                "reason": leave_request["reason"],
-                "status": "approved",
-                "created_at": datetime.now(timezone.utc)
-            }
-            await db.leaves.insert_one(leave_record)
+            leave_records = await build_leave_records([leave_request])
+            if leave_records:
+                await db.leaves.insert_many(leave_records, ordered=False)
         
         # Create notification for employee
-        notification_message = f"Your {leave_request['leave_type']} request from {leave_request['start_date']} to {leave_request['end_date']} has been {approval_data.status}."
-        if approval_data.status == "rejected" and approval_data.manager_reason:
-            notification_message += f" Reason: {approval_data.manager_reason}"
-            
-        notification = {
-            "id": str(uuid.uuid4()),
-            "user_id": leave_request["user_id"],
-            "title": f"Leave Request {approval_data.status.title()}",
-            "message": notification_message,
-            "type": "leave_update",
-            "status": "unread",
-            "created_at": datetime.now(timezone.utc),
-            "related_request_id": request_id
-        }
-        
+        notification = build_leave_notification(leave_request, approval_data.status, approval_data.manager_reason)
         await db.notifications.insert_one(notification)
 
         return {"message": f"Leave request {approval_data.status} successfully"}
@@ -2205,7 +3657,7 @@ async def approve_reject_leave(
 
 # IT Ticket APIs
 @api_router.post("/employee/it-tickets")
-async def create_it_ticket(ticket_data: ITTicketCreate, current_user: User = Depends(get_current_user)):
+async def create_it_ticket(ticket_data: ITTicketCreate, current_user: Principal = Depends(get_current_user)):
     """Create new IT support ticket"""
     try:
         ticket = {
@@ -2228,7 +3680,7 @@ async def create_it_ticket(ticket_data: ITTicketCreate, current_user: User = Dep
         raise HTTPException(status_code=500, detail="Failed to create IT ticket")
 
 @api_router.get("/employee/it-tickets")
-async def get_employee_tickets(current_user: User = Depends(get_current_user)):
+async def get_employee_tickets(current_user: Principal = Depends(get_current_user)):
     """Get IT tickets for current employee"""
     try:
         tickets = await db.it_tickets.find(
@@ -2256,7 +3708,7 @@ async def get_employee_tickets(current_user: User = Depends(get_current_user)):
 
 # Admin Leave Settings APIs
 @api_router.get("/admin/leave-settings")
-async def get_leave_settings(current_admin: User = Depends(get_current_admin)):
+async def get_leave_settings(current_admin: Principal = Depends(get_current_admin)):
     """Get leave settings"""
     try:
         settings = await db.leave_settings.find_one({}) or {}
@@ -2270,7 +3722,7 @@ async def get_leave_settings(current_admin: User = Depends(get_current_admin)):
         return {"error": "Failed to fetch leave settings"}
 
 @api_router.put("/admin/leave-settings")
-async def update_leave_settings(settings: LeaveSettings, current_admin: User = Depends(get_current_admin)):
+async def update_leave_settings(settings: LeaveSettings, current_admin: Principal = Depends(get_current_admin)):
     """Update leave settings"""
     try:
         # Upsert leave settings
@@ -2286,7 +3738,7 @@ async def update_leave_settings(settings: LeaveSettings, current_admin: User = D
 
 # Notification APIs
 @api_router.get("/employee/notifications")
-async def get_employee_notifications(current_user: User = Depends(get_current_user)):
+async def get_employee_notifications(current_user: Principal = Depends(get_current_user)):
     """Get notifications for current employee"""
     try:
         notifications = await db.notifications.find(
@@ -2312,7 +3764,7 @@ async def get_employee_notifications(current_user: User = Depends(get_current_us
         return []
 
 @api_router.put("/employee/notifications/{notification_id}/read")
-async def mark_notification_read(notification_id: str, current_user: User = Depends(get_current_user)):
+async def mark_notification_read(notification_id: str, current_user: Principal = Depends(get_current_user)):
     """Mark notification as read"""
     try:
         # Update notification status
@@ -2333,7 +3785,7 @@ async def mark_notification_read(notification_id: str, current_user: User = Depe
         raise HTTPException(status_code=500, detail="Failed to update notification")
 
 @api_router.get("/employee/notifications/unread-count")
-async def get_unread_notifications_count(current_user: User = Depends(get_current_user)):
+async def get_unread_notifications_count(current_user: Principal = Depends(get_current_user)):
     """Get count of unread notifications"""
     try:
         count = await db.notifications.count_documents({
@@ -2347,7 +3799,7 @@ async def get_unread_notifications_count(current_user: User = Depends(get_curren
 
 # Logo Upload APIs
 @api_router.post("/admin/upload-logo")
-async def upload_logo(current_admin: User = Depends(get_current_admin)):
+async def upload_logo(current_admin: Principal = Depends(get_current_admin)):
     """Upload company logo - expects form data with file"""
     from fastapi import File, UploadFile
     return {"message": "This endpoint will be updated to handle file uploads"}
@@ -2355,7 +3807,7 @@ async def upload_logo(current_admin: User = Depends(get_current_admin)):
 @api_router.post("/admin/upload-logo-base64")
 async def upload_logo_base64(
     logo_data: dict,
-    current_admin: User = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin)
 ):
     """Upload company logo as base64"""
     try:
@@ -2426,7 +3878,7 @@ async def upload_logo_base64(
         raise HTTPException(status_code=500, detail="Failed to upload logo")
 
 @api_router.delete("/admin/remove-logo")
-async def remove_logo(current_admin: User = Depends(get_current_admin)):
+async def remove_logo(current_admin: Principal = Depends(get_current_admin)):
     """Remove company logo"""
     try:
         # Find existing settings and remove logo
@@ -2447,15 +3899,60 @@ async def remove_logo(current_admin: User = Depends(get_current_admin)):
         print(f"Error removing logo: {e}")
         raise HTTPException(status_code=500, detail="Failed to remove logo")
 
+# Request instrumentation
+SERVER_TIMING_HEADER = os.environ.get("SERVER_TIMING_HEADER", "false").lower() == "true"
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Record per-route latency, MongoDB command count and MongoDB time for every request"""
+    stats = new_request_stats()
+    token = current_request_stats.set(stats)
+    try:
+        response = await call_next(request)
+    except Exception:
+        route = request.scope.get("route")
+        record_request(request.method, route.path if route else "unmatched", 500, stats)
+        raise
+    finally:
+        current_request_stats.reset(token)
+    
+    # Label by route template so /admin/user/{user_id}/sessions is one series
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    duration = record_request(request.method, route_path, response.status_code, stats)
+    if is_slow_request(duration, stats):
+        # Logged (and sampled explains run) after the response, outside this request's stats context
+        start_background_task(log_slow_request(db, request.method, route_path, response.status_code, duration, stats))
+    if SERVER_TIMING_HEADER:
+        response.headers["Server-Timing"] = (
+            f"app;dur={duration * 1000:.1f}, "
+            f"db;dur={stats['db_seconds'] * 1000:.1f};desc=\"{stats['db_commands']} commands\""
+        )
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for request latency and MongoDB round trips"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Compress large JSON payloads (organization tree, employee lists, settings with an embedded logo)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "1024")),
+    gzip_level=int(os.environ.get("GZIP_COMPRESSION_LEVEL", "6")),
+    brotli_quality=int(os.environ.get("BROTLI_QUALITY", "4"))
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Configure logging
@@ -2465,25 +3962,369 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
-async def startup_db():
-    # Create indexes
-    await db.users.create_index([("email", ASCENDING)], unique=True)
-    await db.users.create_index([("phone", ASCENDING)], unique=True)
-    await db.sessions.create_index([("user_id", ASCENDING)])
-    await db.breaks.create_index([("session_id", ASCENDING)])
+# One-time migrations
+MIGRATION_LEASE_SECONDS = 300
+MIGRATION_BATCH_SIZE = 1000
+
+class MigrationInProgress(Exception):
+    """Another worker holds the lease on a migration; later migrations may depend on it, so stop here"""
+
+async def run_migration_once(name: str, migration) -> bool:
+    """Run a migration exactly once across all workers, recording a marker in the migrations collection.
+    
+    Returns False if it already completed and raises MigrationInProgress while another worker runs it,
+    so the caller backs off instead of starting migrations that build on this one.
+    """
+    now = datetime.now(timezone.utc)
+    lease = {"status": "running", "started_at": now, "lease_expires_at": now + timedelta(seconds=MIGRATION_LEASE_SECONDS)}
+    try:
+        await db.migrations.insert_one({"_id": name, **lease})
+    except DuplicateKeyError:
+        # Completed, or running in another worker; only take over a run whose worker died
+        claimed = await db.migrations.find_one_and_update(
+            {"_id": name, "status": "running", "lease_expires_at": {"$lt": now}},
+            {"$set": lease}
+        )
+        if not claimed:
+            marker = await db.migrations.find_one({"_id": name}, {"status": 1})
+            if marker and marker.get("status") == "completed":
+                return False
+            raise MigrationInProgress(f"Migration {name} is running in another worker")
+    
+    async def renew_lease():
+        # Keep the lease while a long migration runs so no other worker takes it over mid-run
+        while True:
+            await asyncio.sleep(MIGRATION_LEASE_SECONDS / 3)
+            await db.migrations.update_one(
+                {"_id": name, "status": "running"},
+                {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=MIGRATION_LEASE_SECONDS)}}
+            )
+    
+    renewal = asyncio.create_task(renew_lease())
+    try:
+        result = await migration()
+    except Exception:
+        await db.migrations.delete_one({"_id": name})
+        raise
+    finally:
+        renewal.cancel()
+    
+    await db.migrations.update_one(
+        {"_id": name},
+        {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc), "result": result}}
+    )
+    return True
+
+async def assign_unassigned_employees_to_general():
+    """Assign every employee without a department to General with one anti-join and one insert_many"""
+    default_dept = await db.departments.find_one({"name": "General"}, {"_id": 0, "id": 1})
+    if not default_dept:
+        return {"assigned": 0}
+    
+    unassigned_employees = await db.users.aggregate([
+        {"$match": {"role": "employee", "is_deleted": {"$ne": True}}},
+        {"$lookup": {
+            "from": "employee_departments",
+            "let": {"employee_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$employee_id", "$$employee_id"]}}},
+                {"$limit": 1},
+                {"$project": {"_id": 1}}
+            ],
+            "as": "assignment"
+        }},
+        {"$match": {"assignment": {"$size": 0}}},
+        {"$project": {"_id": 0, "id": 1}}
+    ]).to_list(length=None)
+    
+    if unassigned_employees:
+        now = datetime.now(timezone.utc)
+        try:
+            await db.employee_departments.insert_many([
+                {
+                    "id": str(uuid.uuid4()),
+                    "employee_id": employee["id"],
+                    "department_id": default_dept["id"],
+                    "assigned_at": now
+                }
+                for employee in unassigned_employees
+            ], ordered=False)
+        except BulkWriteError:
+            # Employees assigned concurrently already have their (unique) assignment
+            pass
+        print(f"Auto-assigned {len(unassigned_employees)} employees to General department")
+    
+    return {"assigned": len(unassigned_employees)}
+
+async def backfill_employee_status():
+    """Convert string release dates to dates and store each employee's status"""
+    now = datetime.now(timezone.utc)
+    updates, converted, unparseable_ids = [], 0, []
+    async for employee in db.users.find({"role": "employee"}, {"_id": 1, "release_date": 1}):
+        release_date = employee.get("release_date")
+        update = {}
+        if isinstance(release_date, str):
+            try:
+                release_date = parse_stored_date(release_date, calendar_day=False)
+                update["release_date"] = release_date
+                converted += 1
+            except (ValueError, OverflowError):
+                # Leave the value untouched for manual review, like convert_string_dates
+                print(f"Left unparseable release_date {release_date!r} on user {employee['_id']}")
+                unparseable_ids.append(employee["_id"])
+                release_date = None
+        update["status"] = compute_employee_status(release_date, now)
+        updates.append(UpdateOne({"_id": employee["_id"]}, {"$set": update}))
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            await db.users.bulk_write(updates, ordered=False)
+            updates = []
+    if updates:
+        await db.users.bulk_write(updates, ordered=False)
+    return {"converted": converted, "unparseable": len(unparseable_ids), "unparseable_ids": unparseable_ids}
+
+# (collection, field, calendar day) pairs stored as strings before dates were typed
+STRING_DATE_FIELDS = [
+    ("leaves", "date", True),
+    ("leaves", "start_date", True),
+    ("leaves", "end_date", True),
+    ("holidays", "date", True),
+    ("leave_applications", "start_date", True),
+    ("leave_applications", "end_date", True),
+    ("users", "joining_date", True),
+    ("departments", "created_at", False)
+]
+
+def parse_stored_date(value: str, calendar_day: bool) -> Optional[datetime]:
+    """Parse a legacy string date, falling back to dateutil for free-form values; raises ValueError"""
+    if not value.strip():
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        parsed = date_parser.parse(value)
+    if calendar_day:
+        return to_utc_date(parsed)
+    return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+async def convert_string_dates():
+    """Convert legacy string dates to BSON dates (UTC midnight for calendar days) so range queries use the indexes"""
+    report = {}
+    for collection_name, field, calendar_day in STRING_DATE_FIELDS:
+        collection = db[collection_name]
+        updates, converted, unparseable = [], 0, 0
+        async for doc in collection.find({field: {"$type": "string"}}, {"_id": 1, field: 1}):
+            try:
+                value = parse_stored_date(doc[field], calendar_day)
+            except (ValueError, OverflowError):
+                # Leave free-form values that cannot be read as a date untouched for manual review
+                unparseable += 1
+                continue
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {field: value}}))
+            converted += 1
+            if len(updates) >= MIGRATION_BATCH_SIZE:
+                await collection.bulk_write(updates, ordered=False)
+                updates = []
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+        report[f"{collection_name}.{field}"] = {"converted": converted, "unparseable": unparseable}
+        if unparseable:
+            print(f"Left {unparseable} unparseable {collection_name}.{field} values as strings")
+    return report
+
+async def expand_multi_day_leaves():
+    """Replace legacy approved leave rows spanning start_date..end_date with per-day rows"""
+    expanded = 0
+    while True:
+        legacy = await db.leaves.find(
+            {"date": {"$exists": False}, "start_date": {"$type": "date"}, "end_date": {"$type": "date"}},
+            {"_id": 1, "application_id": 1, "id": 1, "user_id": 1, "leave_type": 1,
+             "start_date": 1, "end_date": 1, "days_count": 1, "reason": 1, "created_at": 1}
+        ).limit(MIGRATION_BATCH_SIZE).to_list(length=None)
+        if not legacy:
+            break
+        
+        applications = [
+            {**leave, "id": leave.get("application_id") or leave["id"], "reason": leave.get("reason", "")}
+            for leave in legacy
+        ]
+        # A run interrupted between the insert and the delete already expanded some rows; only delete those
+        already_expanded = set(await db.leaves.distinct(
+            "application_id",
+            {"application_id": {"$in": [application["id"] for application in applications]}, "date": {"$exists": True}}
+        ))
+        applications = [application for application in applications if application["id"] not in already_expanded]
+        
+        records = await build_leave_records(applications)
+        # Keep the original approval time so ledger seeding still counts the leave in the year it was taken
+        created_at = {application["id"]: application.get("created_at") for application in applications}
+        for record in records:
+            if created_at[record["application_id"]] is None:
+                del record["created_at"]
+            else:
+                record["created_at"] = created_at[record["application_id"]]
+        if records:
+            await db.leaves.insert_many(records, ordered=False)
+        await db.leaves.delete_many({"_id": {"$in": [leave["_id"] for leave in legacy]}})
+        expanded += len(applications)
+    
+    # Rows whose dates typed_dates_v1 could not parse stay as they are and are reported for manual review
+    skipped_ids = await db.leaves.distinct("_id", {
+        "date": {"$exists": False},
+        "$or": [{"start_date": {"$not": {"$type": "date"}}}, {"end_date": {"$not": {"$type": "date"}}}]
+    })
+    if skipped_ids:
+        print(f"Left {len(skipped_ids)} leave rows with unparseable start_date/end_date unexpanded")
+    return {"expanded": expanded, "skipped": len(skipped_ids), "skipped_ids": skipped_ids}
+
+async def backfill_session_work_dates():
+    """Key existing sessions by the local workday they started on, in the employee's or the organization's timezone"""
+    organization_timezone = await get_organization_timezone()
+    user_timezones = {
+        user["id"]: user["timezone"]
+        async for user in db.users.find({"timezone": {"$nin": [None, ""]}}, {"_id": 0, "id": 1, "timezone": 1})
+    }
+    updates, backfilled = [], 0
+    async for session in db.sessions.find({"work_date": {"$exists": False}}, {"_id": 1, "user_id": 1, "start_time": 1}):
+        tz_name = user_timezones.get(session["user_id"], organization_timezone)
+        updates.append(UpdateOne(
+            {"_id": session["_id"]},
+            {"$set": {"work_date": local_work_date(session["start_time"], tz_name)}}
+        ))
+        backfilled += 1
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            await db.sessions.bulk_write(updates, ordered=False)
+            updates = []
+    if updates:
+        await db.sessions.bulk_write(updates, ordered=False)
+    return {"backfilled": backfilled}
+
+async def enforce_unique_session_work_dates():
+    """Keep each employee's earliest session per workday on the key, then make (user_id, work_date) unique"""
+    duplicate_days = await db.sessions.aggregate([
+        {"$match": {"work_date": {"$exists": True}}},
+        {"$group": {"_id": {"user_id": "$user_id", "work_date": "$work_date"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True).to_list(length=None)
+    
+    # Later sessions of the same day keep their date under duplicate_work_date, outside the unique index
+    deduplicated = 0
+    for duplicate_day in duplicate_days:
+        sessions = await db.sessions.find(
+            duplicate_day["_id"], {"_id": 1}, sort=[("start_time", ASCENDING)]
+        ).to_list(length=None)
+        result = await db.sessions.update_many(
+            {"_id": {"$in": [session["_id"] for session in sessions[1:]]}},
+            {"$rename": {"work_date": "duplicate_work_date"}}
+        )
+        deduplicated += result.modified_count
     
+    try:
+        await db.sessions.drop_index("user_id_1_work_date_1")
+    except OperationFailure:
+        pass
+    await db.sessions.create_index(
+        [("user_id", ASCENDING), ("work_date", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"work_date": {"$exists": True}}
+    )
+    return {"deduplicated": deduplicated}
+
+# Scheduled employee status refresh
+EMPLOYEE_STATUS_REFRESH_SECONDS = int(os.environ.get("EMPLOYEE_STATUS_REFRESH_SECONDS", "3600"))
+
+async def deactivate_released_employees() -> int:
+    """Flip employees whose release date has passed to Inactive; idempotent, so every worker may run it"""
+    result = await db.users.update_many(
+        {"status": "Active", "release_date": {"$lte": datetime.now(timezone.utc)}},
+        {"$set": {"status": "Inactive"}}
+    )
+    if result.modified_count:
+        print(f"Marked {result.modified_count} released employees Inactive")
+    return result.modified_count
+
+async def run_employee_status_scheduler():
+    while True:
+        try:
+            await deactivate_released_employees()
+        except Exception as e:
+            print(f"Error refreshing employee status: {e}")
+        await asyncio.sleep(EMPLOYEE_STATUS_REFRESH_SECONDS)
+
+async def ensure_employee_department_index():
+    """Create the unique employee_id index, dropping duplicate assignments only if they block it"""
+    try:
+        await db.employee_departments.create_index([("employee_id", ASCENDING)], unique=True)
+    except OperationFailure as e:
+        if e.code != 11000:
+            raise
+        await dedupe_employee_departments()
+        await db.employee_departments.create_index([("employee_id", ASCENDING)], unique=True)
+
+async def ensure_indexes():
+    """Create all indexes; create_index is a cheap no-op for indexes that already exist"""
+    await asyncio.gather(
+        db.users.create_index([("email", ASCENDING)], unique=True),
+        db.users.create_index([("phone", ASCENDING)], unique=True),
+        db.users.create_index([("id", ASCENDING)], unique=True),
+        # Employee directory search and keyset sorts, built with the directory's case-insensitive collation
+        db.users.create_index(
+            [("role", ASCENDING), ("name", ASCENDING), ("id", ASCENDING)], collation=DIRECTORY_COLLATION
+        ),
+        db.users.create_index(
+            [("role", ASCENDING), ("email", ASCENDING), ("id", ASCENDING)], collation=DIRECTORY_COLLATION
+        ),
+        db.users.create_index(
+            [("role", ASCENDING), ("phone", ASCENDING), ("id", ASCENDING)], collation=DIRECTORY_COLLATION
+        ),
+        db.users.create_index(
+            [("role", ASCENDING), ("joining_date", ASCENDING), ("id", ASCENDING)], collation=DIRECTORY_COLLATION
+        ),
+        # Headcount counts and the scheduled deactivation of employees whose release date has passed
+        db.users.create_index([("role", ASCENDING), ("status", ASCENDING)]),
+        db.users.create_index([("status", ASCENDING), ("release_date", ASCENDING)]),
+        db.departments.create_index([("id", ASCENDING)], unique=True),
+        db.sessions.create_index([("user_id", ASCENDING)]),
+        db.sessions.create_index([("work_date", ASCENDING)]),
+        db.sessions.create_index([("id", ASCENDING)], unique=True),
+        db.breaks.create_index([("session_id", ASCENDING)]),
+        db.timesheets.create_index([("session_id", ASCENDING)]),
+        db.leave_ledger.create_index(
+            [("user_id", ASCENDING), ("year", ASCENDING), ("leave_type", ASCENDING)],
+            unique=True
+        ),
+        db.leave_applications.create_index(
+            [("manager_id", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING)]
+        ),
+        db.leave_applications.create_index([("user_id", ASCENDING), ("created_at", ASCENDING)]),
+        ensure_employee_department_index(),
+        db.employee_departments.create_index([("department_id", ASCENDING), ("assigned_at", ASCENDING)]),
+        db.managers.create_index([("department_id", ASCENDING)]),
+        db.managers.create_index([("employee_id", ASCENDING)]),
+        db.projects.create_index([("department_id", ASCENDING)]),
+        db.projects.create_index([("employee_ids", ASCENDING)]),
+        db.leaves.create_index([("date", ASCENDING)]),
+        db.leaves.create_index([("user_id", ASCENDING), ("date", ASCENDING)]),
+        db.leaves.create_index([("application_id", ASCENDING)]),
+        db.holidays.create_index([("date", ASCENDING)]),
+        db.deletion_jobs.create_index([("id", ASCENDING)], unique=True),
+        db.deletion_jobs.create_index([("status", ASCENDING)]),
+        db.notifications.create_index([("user_id", ASCENDING), ("created_at", ASCENDING)]),
+        db.it_tickets.create_index([("user_id", ASCENDING), ("created_at", ASCENDING)])
+    )
+
+async def seed_defaults():
+    """Seed sample holidays, the default admin and the General department on an empty database"""
     # Seed some sample holidays
     existing_holidays = await db.holidays.count_documents({})
     if existing_holidays == 0:
         sample_holidays = [
-            {"id": str(uuid.uuid4()), "date": "2025-01-01", "name": "New Year's Day", "type": "Mandatory"},
-            {"id": str(uuid.uuid4()), "date": "2025-01-26", "name": "Republic Day", "type": "Mandatory"},
-            {"id": str(uuid.uuid4()), "date": "2025-03-14", "name": "Holi", "type": "Mandatory"},
-            {"id": str(uuid.uuid4()), "date": "2025-08-15", "name": "Independence Day", "type": "Mandatory"},
-            {"id": str(uuid.uuid4()), "date": "2025-10-02", "name": "Gandhi Jayanti", "type": "Mandatory"},
-            {"id": str(uuid.uuid4()), "date": "2025-11-01", "name": "Diwali", "type": "Mandatory"},
-            {"id": str(uuid.uuid4()), "date": "2025-12-25", "name": "Christmas Day", "type": "Mandatory"}
+            {"id": str(uuid.uuid4()), "date": to_utc_date("2025-01-01"), "name": "New Year's Day", "type": "Mandatory"},
+            {"id": str(uuid.uuid4()), "date": to_utc_date("2025-01-26"), "name": "Republic Day", "type": "Mandatory"},
+            {"id": str(uuid.uuid4()), "date": to_utc_date("2025-03-14"), "name": "Holi", "type": "Mandatory"},
+            {"id": str(uuid.uuid4()), "date": to_utc_date("2025-08-15"), "name": "Independence Day", "type": "Mandatory"},
+            {"id": str(uuid.uuid4()), "date": to_utc_date("2025-10-02"), "name": "Gandhi Jayanti", "type": "Mandatory"},
+            {"id": str(uuid.uuid4()), "date": to_utc_date("2025-11-01"), "name": "Diwali", "type": "Mandatory"},
+            {"id": str(uuid.uuid4()), "date": to_utc_date("2025-12-25"), "name": "Christmas Day", "type": "Mandatory"}
         ]
         await db.holidays.insert_many(sample_holidays)
     
@@ -2507,7 +4348,8 @@ async def startup_db():
         default_dept = {
             "id": str(uuid.uuid4()),
             "name": "General",
-            "description": "Default department for all employees"
+            "description": "Default department for all employees",
+            "created_at": datetime.now(timezone.utc)
         }
         await db.departments.insert_one(default_dept)
         
@@ -2515,37 +4357,115 @@ async def startup_db():
         if existing_admin:
             default_manager = {
                 "id": str(uuid.uuid4()),
-                "employee_id": default_admin.id,
+                "employee_id": existing_admin["id"],
                 "department_id": default_dept["id"],
                 "assigned_at": datetime.now(timezone.utc)
             }
             await db.managers.insert_one(default_manager)
             
         print("Default department and manager created")
+
+# One-time migrations, in dependency order
+MIGRATIONS = [
+    # Auto-assign employees without a department to the default department, once per database
+    ("auto_assign_general_department", assign_unassigned_employees_to_general),
+    ("employee_status_v1", backfill_employee_status),
+    ("typed_dates_v1", convert_string_dates),
+    ("expand_multi_day_leaves_v1", expand_multi_day_leaves),
+    ("session_work_date_v1", backfill_session_work_dates),
+    ("session_work_date_unique_v1", enforce_unique_session_work_dates)
+]
+
+async def initialize_database():
+    """Build indexes, seed defaults and run one-time migrations"""
+    await ensure_indexes()
+    await seed_defaults()
+    for name, migration in MIGRATIONS:
+        await run_migration_once(name, migration)
+
+async def pending_migrations() -> list:
+    """Names of migrations not yet marked completed, from a single query on the migrations collection"""
+    completed = set(await db.migrations.distinct("_id", {"status": "completed"}))
+    return [name for name, _ in MIGRATIONS if name not in completed]
+
+# Startup and health checks
+# Indexes and migrations are applied once per deploy with `python manage.py migrate`; workers only check
+# that they have run. Set BOOTSTRAP_ON_STARTUP=true to have each worker apply them itself (e.g. in development)
+BOOTSTRAP_ON_STARTUP = os.environ.get("BOOTSTRAP_ON_STARTUP", "false").lower() == "true"
+READINESS_PING_TIMEOUT_SECONDS = 1
+MIGRATION_POLL_SECONDS = 2
+app.state.ready = False
+app.state.bootstrap_error = None
+app.state.pending_migrations = []
+
+async def bootstrap():
+    """Mark the worker ready once the database is initialized, retrying with backoff, then start background work"""
+    attempt = 0
+    while True:
+        try:
+            if BOOTSTRAP_ON_STARTUP:
+                await initialize_database()
+                app.state.pending_migrations = []
+            else:
+                app.state.pending_migrations = await pending_migrations()
+            app.state.bootstrap_error = None
+            if not app.state.pending_migrations:
+                app.state.ready = True
+                break
+            # Poll quickly while `manage.py migrate` runs so the worker turns ready soon after it finishes
+            await asyncio.sleep(MIGRATION_POLL_SECONDS)
+        except Exception as e:
+            app.state.bootstrap_error = str(e)
+            print(f"Error bootstrapping database: {e}")
+            attempt += 1
+            await asyncio.sleep(min(30, 2 ** attempt))
+    
+    start_background_task(run_employee_status_scheduler())
+    
+    # Pick up employee deletions interrupted by a restart; retried on its own so a failure here
+    # neither reruns the bootstrap nor keeps the scheduler from starting
+    attempt = 0
+    while True:
+        try:
+            await resume_deletion_jobs()
+            return
+        except Exception as e:
+            print(f"Error resuming deletion jobs: {e}")
+            attempt += 1
+            await asyncio.sleep(min(30, 2 ** attempt))
+
+@app.on_event("startup")
+async def startup_db():
+    # The migration check (or, with BOOTSTRAP_ON_STARTUP, the full bootstrap) runs in the background
+    # so the worker starts serving immediately
+    app.state.bootstrap_task = asyncio.create_task(bootstrap())
+
+@app.get("/healthz")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: migrations have run and MongoDB answers a ping"""
+    if not app.state.ready:
+        detail = {"status": "starting"}
+        if app.state.pending_migrations:
+            detail = {"status": "waiting_for_migrations", "pending_migrations": app.state.pending_migrations}
+        if app.state.bootstrap_error:
+            detail = {"status": "error", "error": app.state.bootstrap_error}
+        return JSONResponse(status_code=503, content=detail)
     
-    # Auto-assign all employees without department to the default department
-    unassigned_employees = []
-    all_employees = await db.users.find({"role": "employee"}).to_list(length=None)
-    
-    for employee in all_employees:
-        existing_assignment = await db.employee_departments.find_one({"employee_id": employee["id"]})
-        if not existing_assignment:
-            unassigned_employees.append(employee)
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=READINESS_PING_TIMEOUT_SECONDS)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "error": str(e)})
     
-    if unassigned_employees:
-        # Get default department
-        default_dept = await db.departments.find_one({"name": "General"})
-        if default_dept:
-            for employee in unassigned_employees:
-                assignment = {
-                    "id": str(uuid.uuid4()),
-                    "employee_id": employee["id"],
-                    "department_id": default_dept["id"],
-                    "assigned_at": datetime.now(timezone.utc)
-                }
-                await db.employee_departments.insert_one(assignment)
-            print(f"Auto-assigned {len(unassigned_employees)} employees to General department")
+    return {"status": "ready"}
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    app.state.bootstrap_task.cancel()
+    client.close()
+    if password_hash_pool is not None:
+        password_hash_pool.shutdown(wait=False)
\ No newline at end of file
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Load Test and Benchmark Harness for the Work Hours Tracker backend
+
+Seeds a local MongoDB with a synthetic organization, drives the real API routes with an
+async load generator and reports latency percentiles, throughput and Mongo ops per request.
+
+Usage:
+    # 1. Seed a dedicated benchmark database
+    python benchmark.py seed --mongo-url mongodb://localhost:27017 --db-name trackora_bench \\
+        --employees 1000 --departments 10 --projects 50 --years 2 --reset
+
+    # 2. Start the backend against it (from backend/)
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=trackora_bench uvicorn server:app --port 8001
+
+    # 3. Run the scenarios, save or compare a baseline
+    python benchmark.py run --url http://localhost:8001 --save-baseline benchmark_baseline.json
+    python benchmark.py run --url http://localhost:8001 --baseline benchmark_baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import bcrypt
+import httpx
+from pymongo import MongoClient
+
+BENCH_PASSWORD = "benchpass123"
+ADMIN_EMAIL = "bench.admin@bench.example.com"
+LEAVE_TYPES = ["Casual Leave", "Sick Leave", "Leave without Pay"]
+INSERT_BATCH_SIZE = 5000
+
+
+def employee_email(index):
+    return f"bench.emp{index}@bench.example.com"
+
+
+# ---------------------------------------------------------------------------
+# Synthetic organization generator
+# ---------------------------------------------------------------------------
+
+class BatchWriter:
+    """Buffer documents per collection and flush them with insert_many"""
+
+    def __init__(self, db):
+        self.db = db
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, collection, doc):
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= INSERT_BATCH_SIZE:
+            self.flush(collection)
+
+    def flush(self, collection=None):
+        for name in [collection] if collection else list(self.buffers):
+            buffer = self.buffers.get(name)
+            if buffer:
+                self.db[name].insert_many(buffer, ordered=False)
+                self.counts[name] = self.counts.get(name, 0) + len(buffer)
+                self.buffers[name] = []
+
+
+def workdays(start, end):
+    day = start
+    while day < end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def seed_organization(args):
+    """Generate departments, managers, projects, employees and years of sessions/breaks/leaves"""
+    rng = random.Random(args.seed)
+    client = MongoClient(args.mongo_url)
+    db = client[args.db_name]
+
+    if args.reset:
+        client.drop_database(args.db_name)
+    elif db.users.estimated_document_count():
+        print(f"Database {args.db_name} is not empty; pass --reset to drop it first")
+        return 1
+
+    started = time.perf_counter()
+    writer = BatchWriter(db)
+    now = datetime.now(timezone.utc)
+    # One bcrypt hash shared by every synthetic user keeps seeding fast
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+    def user_doc(name, email, phone, role):
+        return {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "password_hash": password_hash,
+            "role": role,
+            "created_at": now - timedelta(days=365 * args.years),
+        }
+
+    writer.add("users", user_doc("Bench Admin", ADMIN_EMAIL, "", "admin"))
+
+    departments = []
+    for index in range(args.departments):
+        department = {
+            "id": str(uuid.uuid4()),
+            "name": "General" if index == 0 else f"Department {index}",
+            "description": f"Synthetic department {index}",
+            "created_at": now,
+        }
+        departments.append(department)
+        writer.add("departments", department)
+
+    employees = []
+    for index in range(args.employees):
+        employee = user_doc(f"Employee {index}", employee_email(index), f"9{index:09d}", "employee")
+        employee.update({
+            "dob": "1990-01-01",
+            "blood_group": rng.choice(["A+", "B+", "O+", "AB+"]),
+            "emergency_contact": f"8{index:09d}",
+            "address": f"{index} Synthetic Street",
+            "aadhar_card": f"{index:012d}",
+            "designation": rng.choice(["Engineer", "Analyst", "Designer", "Lead"]),
+            "department": "",
+            "joining_date": (now - timedelta(days=rng.randint(30, 365 * args.years))).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ),
+            "release_date": None,
+            "status": "Active",
+        })
+        employees.append(employee)
+        writer.add("users", employee)
+
+    # The first employee of each department manages it
+    employees_by_department = {department["id"]: [] for department in departments}
+    for index, employee in enumerate(employees):
+        department = departments[index % len(departments)]
+        employees_by_department[department["id"]].append(employee)
+        writer.add("employee_departments", {
+            "id": str(uuid.uuid4()),
+            "employee_id": employee["id"],
+            "department_id": department["id"],
+            "assigned_at": now,
+        })
+
+    managers = []
+    for department in departments:
+        members = employees_by_department[department["id"]]
+        if not members:
+            continue
+        manager = {
+            "id": str(uuid.uuid4()),
+            "employee_id": members[0]["id"],
+            "department_id": department["id"],
+            "created_at": now.isoformat(),
+        }
+        managers.append(manager)
+        writer.add("managers", manager)
+
+    for index in range(args.projects):
+        manager = managers[index % len(managers)]
+        members = employees_by_department[manager["department_id"]]
+        writer.add("projects", {
+            "id": str(uuid.uuid4()),
+            "name": f"Project {index}",
+            "description": f"Synthetic project {index}",
+            "department_id": manager["department_id"],
+            "manager_id": manager["id"],
+            "employee_ids": [member["id"] for member in rng.sample(members, min(len(members), args.project_size))],
+            "start_date": (now - timedelta(days=180)).date().isoformat(),
+            "end_date": (now + timedelta(days=180)).date().isoformat(),
+            "status": "Active",
+            "created_at": now.isoformat(),
+        })
+
+    history_start = (now - timedelta(days=365 * args.years)).replace(hour=0, minute=0, second=0, microsecond=0)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    for employee in employees:
+        for day in workdays(history_start, today):
+            roll = rng.random()
+            if roll < args.leave_rate:
+                writer.add("leaves", {
+                    "id": str(uuid.uuid4()),
+                    "user_id": employee["id"],
+                    "date": day,
+                    "type": "half",
+                    "reason": "Half day application",
+                    "status": "approved",
+                })
+                continue
+            if roll > 1 - args.absence_rate:
+                continue
+
+            start_time = day + timedelta(hours=3, minutes=rng.randint(0, 90))
+            session_id = str(uuid.uuid4())
+            break_seconds = 0
+            for _ in range(rng.randint(0, 3)):
+                break_start = start_time + timedelta(hours=rng.randint(1, 7))
+                break_length = rng.randint(300, 1800)
+                break_seconds += break_length
+                writer.add("breaks", {
+                    "id": str(uuid.uuid4()),
+                    "session_id": session_id,
+                    "start_time": break_start,
+                    "end_time": break_start + timedelta(seconds=break_length),
+                })
+            end_time = start_time + timedelta(seconds=9 * 3600 + break_seconds + rng.randint(0, 3600))
+            writer.add("sessions", {
+                "id": session_id,
+                "user_id": employee["id"],
+                "start_time": start_time,
+                "work_date": day,
+                "end_time": end_time,
+                "is_half_day": False,
+                "total_break_seconds": break_seconds,
+                "effective_seconds": int((end_time - start_time).total_seconds()) - break_seconds,
+                "notes": None,
+            })
+            writer.add("timesheets", {
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "task_id": f"TASK-{rng.randint(1, 500)}",
+                "work_description": "Synthetic work",
+                "status": "Completed",
+                "submitted_at": end_time,
+            })
+
+        for _ in range(rng.randint(0, 3)):
+            writer.add("notifications", {
+                "id": str(uuid.uuid4()),
+                "user_id": employee["id"],
+                "title": "Leave Request Approved",
+                "message": "Synthetic notification",
+                "type": "leave_update",
+                "status": rng.choice(["read", "unread"]),
+                "created_at": now - timedelta(days=rng.randint(0, 90)),
+                "related_request_id": None,
+            })
+
+    writer.flush()
+    client.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Seeded {args.db_name} in {elapsed:.1f}s")
+    for collection, count in sorted(writer.counts.items()):
+        print(f"   {collection}: {count}")
+    print(f"Admin login: {ADMIN_EMAIL} / {BENCH_PASSWORD}; employees: bench.emp<N>@bench.example.com / {BENCH_PASSWORD}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Load generator
+# ---------------------------------------------------------------------------
+
+class Recorder:
+    """Collect per-route latencies and errors"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, route, seconds, ok):
+        self.latencies.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+
+async def timed_request(client, recorder, method, route, path=None, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path or route, **kwargs)
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        response, ok = None, False
+    recorder.add(f"{method} {route}", time.perf_counter() - started, ok)
+    return response
+
+
+async def login(client, email, admin=False):
+    if admin:
+        response = await client.post("/api/admin/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+    else:
+        response = await client.post("/api/auth/login", json={"email_or_phone": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_workers(concurrency, duration, worker):
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[worker(index, deadline) for index in range(concurrency)])
+
+
+async def scenario_dashboard_poll(client, recorder, args, employee_headers):
+    """Employees polling their dashboard cards"""
+    routes = [
+        "/api/sessions/active",
+        "/api/employee/notifications/unread-count",
+        "/api/employee/leave-balance",
+        "/api/dashboard/stats",
+        "/api/sessions/history",
+    ]
+
+    async def worker(index, deadline):
+        headers = employee_headers[index % len(employee_headers)]
+        while time.perf_counter() < deadline:
+            for route in routes:
+                await timed_request(client, recorder, "GET", route, headers=headers)
+
+    await run_workers(args.concurrency, args.duration, worker)
+
+
+async def scenario_admin_pages(client, recorder, args, admin_headers):
+    """Admins paging through the admin panel"""
+    routes = [
+        "/api/admin/employees",
+        "/api/admin/users",
+        "/api/admin/organization-tree",
+        "/api/admin/departments",
+        "/api/admin/managers",
+        "/api/admin/projects",
+        "/api/admin/dashboard-stats",
+        "/api/admin/employee-department-assignments",
+        "/api/admin/users-on-leave",
+    ]
+
+    async def worker(index, deadline):
+        while time.perf_counter() < deadline:
+            for route in routes:
+                await timed_request(client, recorder, "GET", route, headers=admin_headers)
+
+    await run_workers(max(1, args.concurrency // 4), args.duration, worker)
+
+
+async def scenario_login_burst(client, recorder, args):
+    """Many employees logging in at once, e.g. at the start of the work day"""
+
+    async def worker(index, deadline):
+        attempt = index
+        while time.perf_counter() < deadline:
+            email = employee_email(attempt % args.employees)
+            await timed_request(
+                client, recorder, "POST", "/api/auth/login",
+                json={"email_or_phone": email, "password": BENCH_PASSWORD}
+            )
+            attempt += args.concurrency
+
+    await run_workers(args.concurrency, args.duration, worker)
+
+
+async def scenario_leave_approvals(client, recorder, args, employee_headers, manager_headers):
+    """Employees applying for leave while their managers work through the inbox"""
+    start_date = (datetime.now(timezone.utc) + timedelta(days=30)).date().isoformat()
+
+    async def employee_worker(index, deadline):
+        headers = employee_headers[index % len(employee_headers)]
+        while time.perf_counter() < deadline:
+            await timed_request(
+                client, recorder, "POST", "/api/employee/apply-leave", headers=headers,
+                json={
+                    "leave_type": "Leave without Pay",
+                    "start_date": start_date,
+                    "end_date": start_date,
+                    "reason": "Benchmark leave",
+                    "days_count": 0.5,
+                }
+            )
+
+    async def manager_worker(index, deadline):
+        headers = manager_headers[index % len(manager_headers)]
+        while time.perf_counter() < deadline:
+            response = await timed_request(client, recorder, "GET", "/api/manager/leave-requests", headers=headers)
+            requests = response.json() if response is not None and response.status_code == 200 else []
+            for request in requests[:5]:
+                await timed_request(
+                    client, recorder, "PUT", "/api/manager/leave-requests/{request_id}",
+                    path=f"/api/manager/leave-requests/{request['id']}", headers=headers,
+                    json={"status": random.choice(["approved", "rejected"]), "manager_reason": "Benchmark"}
+                )
+
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(
+        *[employee_worker(index, deadline) for index in range(max(1, args.concurrency // 2))],
+        *[manager_worker(index, deadline) for index in range(len(manager_headers))],
+    )
+
+
+METRIC_LINE = re.compile(r'^http_request_db_commands_(sum|count)\{method="([^"]+)",route="([^"]+)"\} (\S+)$')
+
+
+async def scrape_db_commands(client):
+    """Read per-route DB command sums/counts from the backend's /metrics endpoint"""
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return {}
+    if response.status_code != 200:
+        return {}
+    totals = {}
+    for line in response.text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, method, route, value = match.groups()
+            totals.setdefault(f"{method} {route}", {"sum": 0.0, "count": 0.0})[kind] = float(value)
+    return totals
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(recorder, duration, db_before, db_after):
+    report = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        before = db_before.get(route, {"sum": 0.0, "count": 0.0})
+        after = db_after.get(route, {"sum": 0.0, "count": 0.0})
+        requests = after["count"] - before["count"]
+        report[route] = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(route, 0),
+            "throughput_rps": round(len(latencies) / duration, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "db_ops_per_request": round((after["sum"] - before["sum"]) / requests, 1) if requests else None,
+        }
+    return report
+
+
+def print_report(name, report, baseline=None, threshold=0.2):
+    print(f"\n=== {name} ===")
+    print(f"{'route':<62} {'reqs':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'db/req':>7}")
+    regressions = []
+    for route, stats in report.items():
+        db_ops = "-" if stats["db_ops_per_request"] is None else stats["db_ops_per_request"]
+        line = (
+            f"{route:<62} {stats['requests']:>6} {stats['errors']:>4} {stats['throughput_rps']:>8} "
+            f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} {db_ops:>7}"
+        )
+        previous = (baseline or {}).get(route)
+        if previous and previous["p95_ms"]:
+            change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"]
+            line += f"   p95 {change:+.0%}"
+            if change > threshold:
+                regressions.append(f"{name}: {route} p95 {previous['p95_ms']}ms -> {stats['p95_ms']}ms")
+        print(line)
+    return regressions
+
+
+async def run_benchmark(args):
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        admin_headers = await login(client, ADMIN_EMAIL, admin=True)
+        employee_count = min(args.employees, args.concurrency * 4)
+        employee_headers = await asyncio.gather(*[
+            login(client, employee_email(index)) for index in range(1, employee_count)
+        ])
+
+        # Managers are the employees recorded in the managers collection
+        managers = (await client.get("/api/admin/managers", headers=admin_headers)).json()
+        manager_emails = [manager["employee_email"] for manager in managers]
+        manager_headers = await asyncio.gather(*[login(client, email) for email in manager_emails[:args.concurrency]])
+
+        scenarios = {
+            "dashboard_poll": lambda recorder: scenario_dashboard_poll(client, recorder, args, employee_headers),
+            "admin_pages": lambda recorder: scenario_admin_pages(client, recorder, args, admin_headers),
+            "login_burst": lambda recorder: scenario_login_burst(client, recorder, args),
+            "leave_approvals": lambda recorder: scenario_leave_approvals(
+                client, recorder, args, employee_headers, manager_headers
+            ),
+        }
+
+        results = {}
+        for name in args.scenarios:
+            recorder = Recorder()
+            db_before = await scrape_db_commands(client)
+            started = time.perf_counter()
+            await scenarios[name](recorder)
+            elapsed = time.perf_counter() - started
+            db_after = await scrape_db_commands(client)
+            results[name] = summarize(recorder, elapsed, db_before, db_after)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["scenarios"]
+
+    regressions = []
+    for name, report in results.items():
+        regressions += print_report(name, report, baseline.get(name), args.regression_threshold)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "config": {"concurrency": args.concurrency, "duration": args.duration, "employees": args.employees},
+                "scenarios": results,
+            }, baseline_file, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"   ❌ {regression}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Work Hours Tracker load test and benchmark harness")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = subparsers.add_parser("seed", help="Seed a synthetic organization into MongoDB")
+    seed_parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    seed_parser.add_argument("--db-name", default="trackora_bench")
+    seed_parser.add_argument("--employees", type=int, default=1000)
+    seed_parser.add_argument("--departments", type=int, default=10)
+    seed_parser.add_argument("--projects", type=int, default=50)
+    seed_parser.add_argument("--project-size", type=int, default=12, help="Members per project")
+    seed_parser.add_argument("--years", type=int, default=1, help="Years of session/break/leave history")
+    seed_parser.add_argument("--leave-rate", type=float, default=0.03, help="Share of workdays taken as leave")
+    seed_parser.add_argument("--absence-rate", type=float, default=0.05, help="Share of workdays without a session")
+    seed_parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+    seed_parser.add_argument("--reset", action="store_true", help="Drop the benchmark database first")
+
+    run_parser = subparsers.add_parser("run", help="Drive the API and report latency and Mongo ops")
+    run_parser.add_argument("--url", default="http://localhost:8001")
+    run_parser.add_argument("--employees", type=int, default=1000, help="Employees seeded (for login emails)")
+    run_parser.add_argument("--concurrency", type=int, default=20)
+    run_parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario")
+    run_parser.add_argument(
+        "--scenarios", nargs="+", default=["dashboard_poll", "admin_pages", "login_burst", "leave_approvals"],
+        choices=["dashboard_poll", "admin_pages", "login_burst", "leave_approvals"]
+    )
+    run_parser.add_argument("--baseline", help="Baseline JSON file to compare against")
+    run_parser.add_argument("--save-baseline", help="Write this run's results as a baseline JSON file")
+    run_parser.add_argument(
+        "--regression-threshold", type=float, default=0.2,
+        help="Fail when a route's p95 is this much slower than the baseline (0.2 = 20%%)"
+    )
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        return seed_organization(args)
+    return asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""
+Shared fixtures
+
+The backend module reads its MongoDB settings at import time, so it is imported once per
+session against a throwaway database on MONGO_TEST_URL. Importing it does not connect;
+tests that need a running mongod skip themselves when none is reachable.
+"""
+
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+MONGO_TEST_URL = os.environ.get("MONGO_TEST_URL", "mongodb://localhost:27017")
+
+
+@pytest.fixture(scope="session")
+def server_module():
+    os.environ["MONGO_URL"] = MONGO_TEST_URL
+    os.environ["DB_NAME"] = f"trackora_test_{uuid.uuid4().hex[:8]}"
+    os.environ["SERVER_TIMING_HEADER"] = "true"
+    os.environ["BOOTSTRAP_ON_STARTUP"] = "false"
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+    import server
+    return server
@@ -0,0 +1,94 @@
+"""
+Leave day rules
+
+Approved leave is recorded, and charged to the ledger, for each weekday in the requested
+span that is not a mandatory holiday; a single day requested as 0.5 is a half day.
+These rules are pure functions and run without a mongod.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+
+def day(month, day_of_month):
+    return datetime(2025, month, day_of_month, tzinfo=timezone.utc)
+
+
+def keys(days):
+    return [value.date().isoformat() for value in days]
+
+
+def test_weekends_are_not_leave_days(server_module):
+    # Thu 13 March .. Tue 18 March 2025
+    assert keys(server_module.leave_working_days(day(3, 13), day(3, 18), set())) == [
+        "2025-03-13", "2025-03-14", "2025-03-17", "2025-03-18"
+    ]
+
+
+def test_weekend_only_span_has_no_leave_days(server_module):
+    assert server_module.leave_working_days(day(3, 15), day(3, 16), set()) == []
+
+
+def test_mandatory_holidays_are_not_leave_days(server_module):
+    holidays = {"2025-03-14"}
+    assert keys(server_module.leave_working_days(day(3, 13), day(3, 18), holidays)) == [
+        "2025-03-13", "2025-03-17", "2025-03-18"
+    ]
+
+
+def test_only_mandatory_holidays_are_skipped(server_module):
+    holidays = [
+        {"date": day(3, 14), "type": "Mandatory"},
+        {"date": day(3, 17), "type": "Optional"},
+        {"date": day(3, 18)},  # untyped holidays predate Optional ones and stay mandatory
+    ]
+    assert server_module.mandatory_holiday_keys(holidays) == {"2025-03-14", "2025-03-18"}
+
+
+def build_records(server_module, monkeypatch, leave_request, holiday_keys=frozenset()):
+    async def holidays(start, end):
+        return set(holiday_keys)
+    monkeypatch.setattr(server_module, "mandatory_holiday_dates", holidays)
+    return asyncio.run(server_module.build_leave_records([leave_request]))
+
+
+def leave_request(start, end, days_count):
+    return {
+        "id": "application-1",
+        "user_id": "user-1",
+        "leave_type": "Casual Leave",
+        "start_date": start,
+        "end_date": end,
+        "days_count": days_count,
+        "reason": "Family",
+    }
+
+
+def test_single_day_half_leave_is_one_half_record(server_module, monkeypatch):
+    records = build_records(server_module, monkeypatch, leave_request(day(3, 13), day(3, 13), 0.5))
+    assert [(record["type"], record["days_count"]) for record in records] == [("half", 0.5)]
+
+
+def test_multi_day_leave_is_full_records_for_working_days(server_module, monkeypatch):
+    records = build_records(server_module, monkeypatch, leave_request(day(3, 13), day(3, 18), 3), {"2025-03-14"})
+    assert keys(record["date"] for record in records) == ["2025-03-13", "2025-03-17", "2025-03-18"]
+    assert {(record["type"], record["days_count"]) for record in records} == {("full", 1)}
+    assert {record["application_id"] for record in records} == {"application-1"}
+
+
+def test_apply_leave_rejects_span_without_working_days(server_module, monkeypatch):
+    async def holidays(start, end):
+        return {"2025-03-14"}
+    monkeypatch.setattr(server_module, "mandatory_holiday_dates", holidays)
+    user = server_module.Principal(name="Employee", email="employee@example.com", phone="1")
+    # Fri 14 March is a holiday and the weekend follows
+    leave_data = server_module.LeaveApplicationCreate(
+        leave_type="Casual Leave", start_date="2025-03-14", end_date="2025-03-16", reason="Trip", days_count=3
+    )
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server_module.apply_leave(leave_data, current_user=user))
+    assert error.value.status_code == 400
+    assert "no working days" in error.value.detail
@@ -0,0 +1,177 @@
+"""
+Query-count regression tests
+
+Counts the MongoDB commands each route issues (via the backend's command listener and
+its Server-Timing header) against a local mongod, and fails when a route's command count
+exceeds its budget or grows with the number of rows, which is how N+1 loops show up.
+
+Runs against MONGO_TEST_URL (default mongodb://localhost:27017) in the throwaway database
+set up by conftest.py and is skipped when no mongod is reachable.
+"""
+
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from tests.conftest import MONGO_TEST_URL
+
+# Command budget per route, including the auth lookup
+QUERY_BUDGETS = {
+    "/api/admin/employees": 4,
+    "/api/admin/users": 4,
+    "/api/admin/projects": 5,
+    "/api/admin/organization-tree": 5,
+    "/api/sessions/history": 4,
+}
+
+
+def mongod_available():
+    try:
+        MongoClient(MONGO_TEST_URL, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not mongod_available(), reason=f"no mongod reachable at {MONGO_TEST_URL}")
+
+
+@pytest.fixture(scope="module")
+def sync_db(server_module):
+    client = MongoClient(MONGO_TEST_URL)
+    yield client[server_module.db.name]
+    client.drop_database(server_module.db.name)
+    client.close()
+
+
+@pytest.fixture(scope="module")
+def api(server_module):
+    from fastapi.testclient import TestClient
+    with TestClient(server_module.app) as test_client:
+        yield test_client
+
+
+class Org:
+    """Synthetic organization that can grow between measurements"""
+
+    def __init__(self, db):
+        self.db = db
+        self.now = datetime.now(timezone.utc)
+        self.admin = self.add_user("admin")
+        self.employee = self.add_user("employee")
+        self.department = {"id": str(uuid.uuid4()), "name": "General", "description": "", "created_at": self.now}
+        db.departments.insert_one(dict(self.department))
+
+    def add_user(self, role):
+        user = {
+            "id": str(uuid.uuid4()),
+            "name": f"{role} {uuid.uuid4().hex[:6]}",
+            "email": f"{uuid.uuid4().hex[:10]}@example.com",
+            "phone": uuid.uuid4().hex[:10],
+            "password_hash": "not-used",
+            "role": role,
+            "created_at": self.now,
+            "release_date": None,
+            "status": "Active",
+        }
+        self.db.users.insert_one(dict(user))
+        return user
+
+    def add_sessions(self, user, count):
+        for index in range(count):
+            start_time = self.now - timedelta(days=index + 1, hours=8)
+            session_id = str(uuid.uuid4())
+            self.db.sessions.insert_one({
+                "id": session_id,
+                "user_id": user["id"],
+                "start_time": start_time,
+                "work_date": start_time.replace(hour=0, minute=0, second=0, microsecond=0),
+                "end_time": start_time + timedelta(hours=9),
+                "is_half_day": False,
+                "total_break_seconds": 600,
+                "effective_seconds": 9 * 3600 - 600,
+                "notes": None,
+            })
+            self.db.breaks.insert_one({
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "start_time": start_time + timedelta(hours=2),
+                "end_time": start_time + timedelta(hours=2, minutes=10),
+            })
+            self.db.timesheets.insert_one({
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "task_id": "TASK-1",
+                "work_description": "Work",
+                "status": "Completed",
+                "submitted_at": start_time + timedelta(hours=9),
+            })
+            self.db.leaves.insert_one({
+                "id": str(uuid.uuid4()),
+                "user_id": user["id"],
+                "date": (start_time - timedelta(days=60)).replace(hour=0, minute=0, second=0, microsecond=0),
+                "type": "half",
+                "reason": "Leave",
+                "status": "approved",
+            })
+
+    def grow(self, employees, sessions_per_employee, projects):
+        """Add employees with session history, a manager and projects staffed by the new employees"""
+        added = [self.add_user("employee") for _ in range(employees)]
+        for employee in added:
+            self.add_sessions(employee, sessions_per_employee)
+        self.add_sessions(self.employee, sessions_per_employee)
+
+        manager = {
+            "id": str(uuid.uuid4()),
+            "employee_id": added[0]["id"],
+            "department_id": self.department["id"],
+            "created_at": self.now.isoformat(),
+        }
+        self.db.managers.insert_one(dict(manager))
+        for index in range(projects):
+            self.db.projects.insert_one({
+                "id": str(uuid.uuid4()),
+                "name": f"Project {index}",
+                "description": "",
+                "department_id": self.department["id"],
+                "manager_id": manager["id"],
+                "employee_ids": [employee["id"] for employee in added],
+                "status": "Active",
+                "created_at": self.now.isoformat(),
+            })
+
+
+@pytest.fixture(scope="module")
+def org(sync_db, server_module):
+    return Org(sync_db)
+
+
+def headers_for(server_module, user):
+    return {"Authorization": f"Bearer {server_module.create_access_token({'sub': user['id']})}"}
+
+
+def count_commands(api, path, headers):
+    response = api.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    match = re.search(r'desc="(\d+) commands"', response.headers["Server-Timing"])
+    return int(match.group(1))
+
+
+@pytest.mark.parametrize("path", sorted(QUERY_BUDGETS))
+def test_query_count_is_bounded_and_independent_of_row_count(api, server_module, org, path):
+    user = org.employee if path == "/api/sessions/history" else org.admin
+    headers = headers_for(server_module, user)
+
+    org.grow(employees=2, sessions_per_employee=2, projects=1)
+    small = count_commands(api, path, headers)
+
+    org.grow(employees=10, sessions_per_employee=6, projects=4)
+    large = count_commands(api, path, headers)
+
+    assert large <= QUERY_BUDGETS[path], f"{path} issued {large} MongoDB commands (budget {QUERY_BUDGETS[path]})"
+    assert large == small, f"{path} issued {small} commands for a small org but {large} for a larger one"
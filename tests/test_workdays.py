@@ -0,0 +1,75 @@
+"""
+Workday boundaries
+
+Sessions are keyed by the calendar day they start on in the employee's (or the
+organization's) timezone. These are pure functions and run without a mongod.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def work_day(server_module, moment, tz_name):
+    return server_module.local_work_date(moment, tz_name).date().isoformat()
+
+
+@pytest.mark.parametrize("moment, expected", [
+    (utc(2025, 3, 4, 18, 29), "2025-03-04"),  # 23:59 IST
+    (utc(2025, 3, 4, 18, 30), "2025-03-05"),  # 00:00 IST
+    (utc(2025, 3, 4, 20, 0), "2025-03-05"),   # 01:30 IST, still the previous UTC day
+    (utc(2025, 3, 5, 3, 30), "2025-03-05"),   # 09:00 IST
+])
+def test_kolkata_early_morning_logins_fall_on_the_local_day(server_module, moment, expected):
+    assert work_day(server_module, moment, "Asia/Kolkata") == expected
+
+
+@pytest.mark.parametrize("tz_name, moment, expected", [
+    ("Pacific/Kiritimati", utc(2025, 3, 5, 9, 59), "2025-03-05"),  # UTC+14: 23:59 local
+    ("Pacific/Kiritimati", utc(2025, 3, 5, 10, 0), "2025-03-06"),  # 00:00 local, a day ahead of UTC
+    ("Etc/GMT+12", utc(2025, 3, 5, 11, 59), "2025-03-04"),         # UTC-12: 23:59 local, a day behind UTC
+    ("Etc/GMT+12", utc(2025, 3, 5, 12, 0), "2025-03-05"),
+])
+def test_extreme_offsets_move_across_the_utc_date(server_module, tz_name, moment, expected):
+    assert work_day(server_module, moment, tz_name) == expected
+
+
+def test_naive_datetimes_are_treated_as_utc(server_module):
+    assert work_day(server_module, datetime(2025, 3, 4, 20, 0), "Asia/Kolkata") == "2025-03-05"
+
+
+def test_spring_forward_day_is_23_hours(server_module):
+    start, end = server_module.workday_window("America/New_York", utc(2025, 3, 9))
+    assert (start, end) == (utc(2025, 3, 9, 5), utc(2025, 3, 10, 4))
+    assert end - start == timedelta(hours=23)
+    assert work_day(server_module, utc(2025, 3, 10, 3, 59), "America/New_York") == "2025-03-09"
+    assert work_day(server_module, utc(2025, 3, 10, 4, 0), "America/New_York") == "2025-03-10"
+
+
+def test_fall_back_day_is_25_hours(server_module):
+    start, end = server_module.workday_window("America/New_York", utc(2025, 11, 2))
+    assert (start, end) == (utc(2025, 11, 2, 4), utc(2025, 11, 3, 5))
+    assert end - start == timedelta(hours=25)
+    # 00:30 EST on 3 November, after the extra hour
+    assert work_day(server_module, utc(2025, 11, 3, 4, 30), "America/New_York") == "2025-11-02"
+    assert work_day(server_module, utc(2025, 11, 3, 5, 0), "America/New_York") == "2025-11-03"
+
+
+def test_workday_windows_are_cached(server_module):
+    server_module.workday_window.cache_clear()
+    for hour in range(24):
+        server_module.local_work_date(utc(2025, 3, 5, hour), "Asia/Kolkata")
+    assert server_module.workday_window.cache_info().misses == 1
+
+
+def test_invalid_timezones_are_rejected(server_module):
+    assert server_module.timezone_or_400(" ") == ""
+    assert server_module.timezone_or_400("Asia/Kolkata") == "Asia/Kolkata"
+    with pytest.raises(HTTPException) as error:
+        server_module.timezone_or_400("Mars/Olympus_Mons")
+    assert error.value.status_code == 400